@@ -1,50 +1,176 @@
 # -*- encoding: utf-8 -*-
 """为进度添加图标"""
 
-import json
-from pptx import Presentation as prstt
-from pptx.util import Cm
-from base import (
-    P,
-    PPT_DIR,
-    IMAGE_DIR,
-    sort_data,
-    load_language_files,
-    lang_file_list,
-    language_data_all,
-)
-
-with open(P / "advancements_data.json", "r", encoding="utf-8") as f:
-    data_adv = json.load(f)
-
-sorted_data = sort_data(load_language_files(lang_file_list), "advancements")["en_us"]
-
-prs_path = PPT_DIR / "advancements" / "output.pptx"
-prs = prstt(prs_path)
-
-for n, slide in enumerate(prs.slides):
-    key, value = sorted_data[n]
-    bg_path = IMAGE_DIR / "advancements" / f"{data_adv[key]["frame"]}.png"
-    slide.shapes.add_picture(
-        image_file=str(bg_path),
-        left=Cm(25.82),
-        top=Cm(7.3),
-        width=Cm(5.2),
-        height=Cm(5.2),
-    )
-    icon = data_adv[key]["icon"]
-    icon_key = f"item.minecraft.{icon}"
-    if icon_key in language_data_all:
-        icon_path = IMAGE_DIR / "item" / f"{language_data_all[icon_key]}.png"
-    else:
-        icon_key = f"block.minecraft.{icon}"
-        icon_path = IMAGE_DIR / "block" / f"{language_data_all[icon_key]}.png"
-    slide.shapes.add_picture(
-        image_file=str(icon_path),
-        left=Cm(26.82),
-        top=Cm(8.3),
-        width=Cm(3.2),
-        height=Cm(3.2),
-    )
-
-prs.save(PPT_DIR / "advancements" / "output.pptx")
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from pptx.util import Cm, Emu
+
+from base import P, store, Ldata
+from json_backend import backend
+from image_index import Box, ImageIndex, ImageSpec
+
+# 进度边框与图标数据
+ADVANCEMENTS_DATA_PATH = P / "advancements_data.json"
+# 边框位置与大小，转换为Emu，跨进程传递时数值不变
+FRAME_BOX: Box = (Emu(Cm(25.82)), Emu(Cm(7.3)), Emu(Cm(5.2)), Emu(Cm(5.2)))
+# 图标位置与大小
+ICON_BOX: Box = (Emu(Cm(26.82)), Emu(Cm(8.3)), Emu(Cm(3.2)), Emu(Cm(3.2)))
+# 边框与图标所在的图片分类
+IMAGE_CATEGORIES = ("advancements", "item", "block")
+# 解析图标所需的名称的键名前缀
+NAME_PREFIXES = ("item.minecraft.", "block.minecraft.")
+
+
+def load_advancements_data(
+    path: Path = ADVANCEMENTS_DATA_PATH,
+) -> Dict[str, Dict[str, str]]:
+    """
+    读取进度边框与图标数据。
+
+    Args:
+        path (Path): 数据文件路径
+
+    Returns:
+        Dict[str, Dict[str, str]]: 进度键名与其边框、图标
+    """
+
+    return backend.load(path)
+
+
+def icon_names(language_data_all: Ldata) -> Ldata:
+    """
+    从完整的英文语言数据中取出解析图标所需的物品与方块名称，可与语言数据一同缓存。
+
+    Args:
+        language_data_all (Ldata): 修正后的完整英文语言数据
+
+    Returns:
+        Ldata: 物品与方块的键名与名称
+    """
+
+    return {k: v for k, v in language_data_all.items() if k.startswith(NAME_PREFIXES)}
+
+
+def icon_candidates(icon: str, names: Ldata) -> List[Tuple[str, str]]:
+    """
+    获取进度图标可能对应的图片，依次为物品图片与方块图片。
+
+    Args:
+        icon (str): 图标ID
+        names (Ldata): 物品与方块的键名与名称
+
+    Returns:
+        List[Tuple[str, str]]: 图片分类与文件名
+    """
+
+    candidates = []
+    if (name := names.get(f"item.minecraft.{icon}")) is not None:
+        candidates.append(("item", f"{name}.png"))
+    name = names.get(f"block.minecraft.{icon}", icon)
+    candidates.append(("block", f"{name}.png"))
+    return candidates
+
+
+class AdvancementIcons:
+    """
+    进度幻灯片所需的边框与图标图片。
+    创建时一次性解析并检查所有进度的图片，缺失的图片不会被添加。
+    默认按图片元数据索引判断图片是否存在，也可传入其他判断方式，如文件夹的文件列表。
+    物品与方块名称默认取自完整的英文语言数据，传入缓存的名称时无需读取语言文件。
+    跨进程传递时只传递解析结果。
+    """
+
+    def __init__(
+        self,
+        index: Optional[ImageIndex] = None,
+        data_adv: Optional[Dict[str, Dict[str, str]]] = None,
+        exists: Optional[Callable[[str, str], bool]] = None,
+        names: Optional[Ldata] = None,
+    ) -> None:
+        self.index = ImageIndex() if index is None else index
+        self._data_adv = load_advancements_data() if data_adv is None else data_adv
+        self._names = store.language_data_all if names is None else names
+        if exists is None:
+            for category in IMAGE_CATEGORIES:
+                self.index.refresh(category)
+        self._exists = self._indexed if exists is None else exists
+        self.assets: Dict[str, List[ImageSpec]] = {}
+        self.missing: Dict[str, List[str]] = {}
+        for key, entry in self._data_adv.items():
+            self._resolve(key, entry)
+
+    def _indexed(self, category: str, name: str) -> bool:
+        """
+        按图片元数据索引判断图片是否存在。
+
+        Args:
+            category (str): 图片分类
+            name (str): 图片文件名
+
+        Returns:
+            bool: 如果图片存在，返回 True，否则返回 False
+        """
+
+        return self.index.get(category, name) is not None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"assets": self.assets, "missing": self.missing}
+
+    def _resolve(self, key: str, entry: Dict[str, str]) -> None:
+        """
+        解析单个进度的边框与图标图片，并记录缺失的图片。
+
+        Args:
+            key (str): 进度键名
+            entry (Dict[str, str]): 进度的边框与图标
+        """
+
+        assets: List[ImageSpec] = []
+        frame = f"{entry['frame']}.png"
+        if self._exists("advancements", frame):
+            assets.append(("advancements", frame, FRAME_BOX))
+        else:
+            self.missing.setdefault(key, []).append(f"advancements/{frame}")
+        candidates = icon_candidates(entry["icon"], self._names)
+        for category, name in candidates:
+            if self._exists(category, name):
+                assets.append((category, name, ICON_BOX))
+                break
+        else:
+            self.missing.setdefault(key, []).append(
+                "或".join(f"{category}/{name}" for category, name in candidates)
+            )
+        self.assets[key] = assets
+
+    def images(self, key: str) -> List[ImageSpec]:
+        """
+        获取进度幻灯片所需的图片。
+
+        Args:
+            key (str): 进度键名
+
+        Returns:
+            List[ImageSpec]: 各图片的分类、文件名与位置大小
+        """
+
+        return self.assets.get(key, [])
+
+    def problems(self, keys: Iterable[str]) -> List[str]:
+        """
+        检查进度所需的数据与图片。
+
+        Args:
+            keys (Iterable[str]): 进度键名
+
+        Returns:
+            List[str]: 各进度缺失的数据或图片
+        """
+
+        result = []
+        for key in keys:
+            if key not in self.assets:
+                result.append(f"{key}：无边框与图标数据")
+            for missing in self.missing.get(key, []):
+                result.append(f"{key}：无法找到图片{missing}")
+        return result
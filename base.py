@@ -1,12 +1,18 @@
 # -*- encoding: utf-8 -*-
 """基础文件"""
 
+import os
 import re
-import json
 import sys
+import hashlib
+import pickle
 import tomllib as tl
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Tuple, TypeAlias
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TypeAlias, Union
+
+from json_backend import backend
+from string_table import StringTable, TableView
 
 # 当前绝对路径
 P = Path(__file__).resolve().parent
@@ -16,8 +22,8 @@ Ldata: TypeAlias = Dict[str, str]
 LdataCo: TypeAlias = Dict[str, Ldata]
 LdataTuple: TypeAlias = List[Tuple[str, str]]
 
-# 加载配置
-CONFIG_PATH = P / "configuration.toml"
+# 加载配置，可通过环境变量MC_SLIDE_CONFIG指定其他配置文件
+CONFIG_PATH = Path(os.environ.get("MC_SLIDE_CONFIG", P / "configuration.toml"))
 if not CONFIG_PATH.exists():
     print("\n无法找到配置文件，请将配置文件放置在与此脚本同级的目录下。")
     sys.exit()
@@ -29,7 +35,13 @@ LANG_DIR = P / config["folder"]["language_folder"]
 IMAGE_DIR = P / config["folder"]["image_folder"]
 LOG_DIR = P / config["folder"]["log_folder"]
 PPT_DIR = P / config["folder"]["slide_folder"]
+CACHE_DIR = P / config["folder"]["cache_folder"]
+FRAME_DIR = P / config["folder"]["frame_folder"]
 SLIDE_CONFIG = config["slide"]
+SHARD_SIZE = config["slide"]["shard_size"]
+RENDER_CONFIG = config["render"]
+PROFILE_CONFIG = config["profile"]
+backend.use(config["json"]["backend"])
 IGNORE_CATEGORIES = {
     "advancements": config["category"]["ignore_advancements"],
     "biome": config["category"]["ignore_biome"],
@@ -40,13 +52,78 @@ IGNORE_CATEGORIES = {
     "enchantment": config["category"]["ignore_enchantment"],
 }
 IGNORE_SAVED_IMAGE = config["image"]["ignore_saved_image"]
+MAX_WORKERS = config["image"]["max_workers"]
+REQUESTS_PER_SECOND = config["image"]["requests_per_second"]
+TITLE_TTL_DAYS = config["image"]["title_ttl_days"]
+MISSING_TITLE_TTL_DAYS = config["image"]["missing_title_ttl_days"]
+OPTIMIZE_IMAGES = config["image"]["optimize"]
 IGNORE_SUPPLEMENTS = config["lang"]["ignore_supplements"]
 NEW_STRINGS_ONLY = config["lang"]["new_strings_only"]
+DIFF_VERSIONS = [P / version for version in config["diff"]["versions"]]
+CHANGELOG_PATH = P / "changelog.json"
 
 lang_list = ["en_us", "zh_cn", "zh_hk", "zh_tw", "lzh"]
 lang_file_list = [f"{l}.json" for l in lang_list]
 lang_list_table = lang_list[1:]
 
+# 生成幻灯片的分类
+CATEGORIES: Tuple[str, ...] = (
+    "advancements",
+    "biome",
+    "block",
+    "entity",
+    "item",
+    "effect",
+    "enchantment",
+)
+
+# 键名分类规则，按顺序匹配键名开头，分类为None表示无效键名
+KEY_RULES: List[Tuple[str, Optional[str]]] = [
+    (r"advancements\..*\.title", "advancements"),
+    (
+        r"(?:block\.minecraft\.set_spawn|entity\.minecraft\.falling_block_type"
+        r"|filled_map\.(?:id|level|locked|scale|unknown))\Z",
+        None,
+    ),
+    (r".*pottery_shard", None),
+    (r"item\.minecraft\.[^.]*\.effect\.[^.]*", "item"),
+    (r"(?:block|item|entity)\.minecraft\.[^.]*\.", None),
+    (r"block\.", "block"),
+    (r"item\.minecraft\.|filled_map", "item"),
+    (r"entity\.minecraft\.", "entity"),
+    (r"biome\.", "biome"),
+    (r"effect\.minecraft\.", "effect"),
+    (r"enchantment\.minecraft\.", "enchantment"),
+    (r"trim_pattern\.", "trim_pattern"),
+    (r"upgrade\.", "upgrade"),
+]
+# 所有规则合并而成的正则表达式，一次匹配即可确定分类
+KEY_PATTERN = re.compile(
+    "|".join(f"(?P<r{i}>{rule})" for i, (rule, _) in enumerate(KEY_RULES))
+)
+KEY_CATEGORIES = {f"r{i}": category for i, (_, category) in enumerate(KEY_RULES)}
+# 合并为一条的音乐唱片与旗帜图案键名
+MERGED_KEY_PATTERN = re.compile(
+    r"item\.minecraft\.(?:music_disc|[^.]*_banner_pattern\Z)"
+)
+
+
+def classify_key(input_key: str) -> Optional[str]:
+    """
+    获取键名的分类。
+
+    Args:
+        input_key (str): 键名
+
+    Returns:
+        Optional[str]: 分类名称，无效键名返回None
+    """
+
+    if m := KEY_PATTERN.match(input_key):
+        return KEY_CATEGORIES[m.lastgroup]
+    return None
+
+
 def is_valid_key(input_key: str, *categories: str) -> bool:
     """
     判断是否为有效键名。
@@ -58,7 +135,7 @@ def is_valid_key(input_key: str, *categories: str) -> bool:
     Returns:
         bool: 如果是有效键名，返回 True，否则返回 False
     """
-    return any(input_key.startswith(f"{category}") for category in categories)
+    return classify_key(input_key) in categories
 
 
 def load_language_files(file_list: List[str]) -> Tuple[LdataCo, LdataCo]:
@@ -69,96 +146,294 @@ def load_language_files(file_list: List[str]) -> Tuple[LdataCo, LdataCo]:
         file_list (List[str]): 语言文件名列表
 
     Returns:
-        Tuple[LdataCo, LdataCo]: 包含语言数据的字典
+        Tuple[LdataCo, LdataCo]: 新增部分与完整的语言数据，不仅生成新增字符串时两者为同一字典
     """
 
     print("开始读取语言文件。")
     data, data_all = {}, {}
     for file in file_list:
-        with open(LANG_DIR / file, "r", encoding="utf-8") as lang:
-            data_all[l := file.split(".", maxsplit=1)[0]] = json.load(lang)
-            if NEW_STRINGS_ONLY:
-                data[l] = {k: v for k, v in data_all[l].items() if k in language_data}
+        l = file.split(".", maxsplit=1)[0]
+        data_all[l] = store.load(l).copy()
+        if NEW_STRINGS_ONLY:
+            new_keys = store.language_data
+            data[l] = {k: v for k, v in data_all[l].items() if k in new_keys}
+        else:
+            data[l] = data_all[l]
     print("语言文件读取成功。")
     return data, data_all
 
 
-def sort_data(lang_data: LdataCo, *categories: str) -> Dict[str, LdataTuple]:
+def sort_data(lang_data: Union[LdataCo, StringTable], *categories: str) -> TableView:
     """
     排序语言数据。
 
     Args:
-        lang_data (LdataCo): 语言数据
+        lang_data (Union[LdataCo, StringTable]): 语言数据或字符串表
         categories (str): （多个）分类
 
     Returns:
-        Dict[str, LdataTuple]: 排序后的语言数据
-    """
-
-    sorted_data = {
-        "en_us": sorted(
-            (
-                (key, value)
-                for key, value in lang_data["en_us"].items()
-                if is_valid_key(key, *categories)
-            ),
-            key=lambda x: x[1],
-        )
-    }
-    sorted_keys = [item[0] for item in sorted_data["en_us"]]
-    for lang_name in ["zh_cn", "zh_hk", "zh_tw", "lzh"]:
-        sorted_data[lang_name] = sorted(
-            (
-                (key, value)
-                for key, value in lang_data[lang_name].items()
-                if is_valid_key(key, *categories)
-            ),
-            key=lambda x: sorted_keys.index(x[0]),
-        )
-    return sorted_data
-
-
-# 读取语言文件
-with open(LANG_DIR / "en_us.json", "r", encoding="utf-8") as f:
-    language_data_all: Ldata = json.load(f)
-if NEW_STRINGS_ONLY:
-    LANG_FILE_PATH = P / "en_us_diff.json"
-    with LANG_FILE_PATH.open("r", encoding="utf-8") as f:
-        language_data: Ldata = json.load(f)
-else:
-    language_data = language_data_all
-
-# 修正语言文件
-for d in [language_data, language_data_all]:
-    keys_to_remove = [
-        key
-        for key in d.keys()
-        if key.startswith("item.minecraft.music_disc")
-        or re.match(r"^item\.minecraft\.[^.]*_banner_pattern$", key)
+        TableView: 按源字符串排序后的视图
+    """
+
+    table = as_string_table(lang_data)
+    buckets = table.group_rows(classify_key, categories)
+    return table.sorted_view(row for rows in buckets.values() for row in rows)
+
+
+def sort_categories(
+    lang_data: Union[LdataCo, StringTable], categories: Iterable[str]
+) -> Dict[str, TableView]:
+    """
+    一次性排序多个分类的语言数据。
+
+    Args:
+        lang_data (Union[LdataCo, StringTable]): 语言数据或字符串表
+        categories (Iterable[str]): 分类名称
+
+    Returns:
+        Dict[str, TableView]: 各分类按源字符串排序后的视图
+    """
+
+    table = as_string_table(lang_data)
+    buckets = table.group_rows(classify_key, categories)
+    return {name: table.sorted_view(rows) for name, rows in buckets.items()}
+
+
+def as_string_table(lang_data: Union[LdataCo, StringTable]) -> StringTable:
+    """
+    将语言数据转换为字符串表。
+
+    Args:
+        lang_data (Union[LdataCo, StringTable]): 语言数据或字符串表
+
+    Returns:
+        StringTable: 字符串表
+    """
+
+    if isinstance(lang_data, StringTable):
+        return lang_data
+    return StringTable.from_language_data(lang_data)
+
+
+# 缓存格式版本，修改缓存内容的处理逻辑时需递增
+CACHE_VERSION = 2
+
+
+def file_digest(*paths: Path) -> str:
+    """
+    计算（多个）文件内容的哈希值，不存在的文件仅计入其路径。
+
+    Args:
+        paths (Path): 文件路径
+
+    Returns:
+        str: 十六进制哈希值
+    """
+
+    h = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path in paths:
+        h.update(str(path).encode("utf-8"))
+        if path.is_file():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def language_inputs() -> List[Path]:
+    """
+    获取读取与修正语言数据所用的文件。
+
+    Returns:
+        List[Path]: 各语言文件、补充字符串、新增字符串与变更记录的路径
+    """
+
+    return [
+        *(LANG_DIR / file for file in lang_file_list),
+        LANG_DIR / "supplements.json",
+        P / "en_us_diff.json",
+        CHANGELOG_PATH,
     ]
-    keys_to_remove.append("item.minecraft.smithing_template")
 
-    for key in keys_to_remove:
-        d.pop(key, None)
 
-    updated_language_data = d.copy()
+def language_digest() -> str:
+    """
+    计算语言数据缓存的键，包含读取语言数据所用的文件与影响修正结果的配置项，
+    修改其他配置项不会使缓存失效。
+
+    Returns:
+        str: 十六进制哈希值
+    """
+
+    settings = [
+        *sorted(config["lang"].items()),
+        ("language_folder", config["folder"]["language_folder"]),
+        ("cache_folder", config["folder"]["cache_folder"]),
+    ]
+    h = hashlib.sha256(file_digest(*language_inputs()).encode())
+    h.update(repr(settings).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_cache(name: str, digest: str) -> Optional[Any]:
+    """
+    读取缓存。
+
+    Args:
+        name (str): 缓存名称
+        digest (str): 源文件哈希值
+
+    Returns:
+        Optional[Any]: 缓存的数据，若不存在或已失效则返回None
+    """
+
+    try:
+        with open(CACHE_DIR / f"{name}.pickle", "rb") as f:
+            cached_digest, data = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    return data if cached_digest == digest else None
 
-    for key, value in d.items():
-        if "trim_smithing_template" in key:
-            variant = key.split(".")[2].split("_", maxsplit=1)[0]
-            variant_string = updated_language_data.get(
-                f"trim_pattern.minecraft.{variant}", variant
-            )
-            updated_language_data[key] = f"{variant_string} Smithing Template"
 
-    d.update(updated_language_data)
+def save_cache(name: str, digest: str, data: Any) -> None:
+    """
+    写入缓存。
+
+    Args:
+        name (str): 缓存名称
+        digest (str): 源文件哈希值
+        data (Any): 需要缓存的数据
+    """
 
-update_data = {
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp_path = CACHE_DIR / f"{name}.pickle.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((digest, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(CACHE_DIR / f"{name}.pickle")
+
+
+# 修正英文语言数据时补充的字符串
+UPDATE_DATA: Ldata = {
     "item.minecraft.netherite_upgrade_smithing_template": "Netherite Upgrade Smithing Template",
     "item.minecraft.music_disc_*": "Music Disc",
     "item.minecraft.*_banner_pattern": "Banner Pattern",
 }
 
-language_data_all.update(update_data)
-if not NEW_STRINGS_ONLY:
-    language_data.update(update_data)
+
+def fix_language_data(d: Ldata) -> Ldata:
+    """
+    修正英文语言数据，合并音乐唱片、旗帜图案与锻造模板。
+
+    Args:
+        d (Ldata): 原始语言数据
+
+    Returns:
+        Ldata: 修正后的语言数据（新字典）
+    """
+
+    fixed_data = {k: v for k, v in d.items() if not MERGED_KEY_PATTERN.match(k)}
+    fixed_data.pop("item.minecraft.smithing_template", None)
+
+    for k in fixed_data:
+        if "trim_smithing_template" in k:
+            variant = k.split(".")[2].split("_", maxsplit=1)[0]
+            variant_string = fixed_data.get(
+                f"trim_pattern.minecraft.{variant}", variant
+            )
+            fixed_data[k] = f"{variant_string} Smithing Template"
+    return fixed_data
+
+
+def new_strings(changelog: Dict[str, Any], lang: str = "en_us") -> Ldata:
+    """
+    从变更记录中获取首个版本之后新增、且在最新版本中仍存在的字符串。
+
+    Args:
+        changelog (Dict[str, Any]): 变更记录
+        lang (str): 语言名称
+
+    Returns:
+        Ldata: 新增的字符串，值为最新版本中的字符串
+    """
+
+    result: Ldata = {}
+    # 首个版本中已有、之后被移除的键名，重新加入时不算作新增
+    removed_from_first: Set[str] = set()
+    for step in changelog["steps"]:
+        if (change := step["locales"].get(lang)) is None:
+            continue
+        for key in change["removed"]:
+            if key in result:
+                del result[key]
+            else:
+                removed_from_first.add(key)
+        for key, value in change["changed"].items():
+            if key in result:
+                result[key] = value
+        for key, value in change["added"].items():
+            if key in removed_from_first:
+                removed_from_first.discard(key)
+            else:
+                result[key] = value
+    return result
+
+
+class LanguageStore:
+    """语言数据存储，各文件在首次访问时读取，每个进程仅读取一次。"""
+
+    def __init__(self) -> None:
+        self._files: LdataCo = {}
+
+    def load(self, lang: str) -> Ldata:
+        """
+        读取语言文件，结果会被缓存，调用方不应修改返回的字典。
+
+        Args:
+            lang (str): 语言名称
+
+        Returns:
+            Ldata: 语言数据
+        """
+
+        if lang not in self._files:
+            self._files[lang] = backend.load(LANG_DIR / f"{lang}.json")
+        return self._files[lang]
+
+    def release(self) -> None:
+        """
+        释放已读取的语言文件，之后访问时重新读取。
+        """
+        self._files.clear()
+
+    def reset(self) -> None:
+        """
+        释放已读取的语言文件，并清除修正后的英文语言数据，之后访问时按文件的当前内容重新读取。
+        """
+        self._files.clear()
+        self.__dict__.pop("language_data_all", None)
+        self.__dict__.pop("language_data", None)
+
+    @cached_property
+    def language_data_all(self) -> Ldata:
+        """修正后的完整英文语言数据"""
+        return fix_language_data(self.load("en_us")) | UPDATE_DATA
+
+    @cached_property
+    def language_data(self) -> Ldata:
+        """
+        修正后的英文语言数据，仅生成新增字符串时为新增部分。
+        新增部分优先从变更记录中获取，不存在变更记录时读取“en_us_diff.json”。
+        """
+        if not NEW_STRINGS_ONLY:
+            return self.language_data_all
+        if CHANGELOG_PATH.exists():
+            return fix_language_data(new_strings(backend.load(CHANGELOG_PATH)))
+        return fix_language_data(backend.load(P / "en_us_diff.json"))
+
+
+store = LanguageStore()
+
+
+def __getattr__(name: str) -> Ldata:
+    """按需提供 language_data 与 language_data_all。"""
+    if name in ("language_data", "language_data_all"):
+        return getattr(store, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,563 @@
+# -*- encoding: utf-8 -*-
+"""性能基准测试脚本，使用合成数据，无需完整的语言文件。"""
+
+import argparse
+import json
+import random
+import re
+import string
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+from pptx.presentation import Presentation
+
+from base import (
+    LANG_DIR,
+    PPT_DIR,
+    CATEGORIES,
+    lang_file_list,
+    lang_list,
+    lang_list_table,
+    classify_key,
+    is_valid_key,
+    sort_data,
+    sort_categories,
+    LdataCo,
+    LdataTuple,
+)
+from image_index import ImageIndex, placement_box
+from json_backend import JsonBackend, available_backends, backend, dump_json
+from slide import add_image
+from slide_cloner import replicate_slide
+from string_table import StringTable
+
+# 合成数据规模
+SCALES = [1_000, 10_000, 100_000]
+# 旧版排序为O(n²)，仅在此规模以下参与对比
+LEGACY_LIMIT = 10_000
+# 添加图片基准测试的合成数据规模，约四分之一为物品
+IMAGE_SCALE = 4_000
+# 合成键名的格式
+SYNTHETIC_KEYS = [
+    "advancements.story.{}.title",
+    "biome.minecraft.{}",
+    "block.minecraft.{}",
+    "entity.minecraft.{}",
+    "item.minecraft.{}",
+    "filled_map.{}",
+    "effect.minecraft.{}",
+    "enchantment.minecraft.{}",
+]
+# 键名分类基准测试的重复次数
+CLASSIFY_ROUNDS = 20
+# 读取语言文件基准测试的重复次数
+JSON_ROUNDS = 5
+
+# 旧版各分类的键名前缀
+LEGACY_PREFIXES: Dict[str, Tuple[str, ...]] = {
+    "advancements": ("advancements",),
+    "biome": ("biome",),
+    "block": ("block",),
+    "entity": ("entity",),
+    "item": ("item", "filled_map"),
+    "effect": ("effect",),
+    "enchantment": ("enchantment",),
+    "trim_pattern": ("trim_pattern",),
+    "upgrade": ("upgrade",),
+}
+# 旧版键名检查所用的前缀、正则表达式与排除的键名
+LEGACY_VALID_PREFIXES: Tuple[str, ...] = (
+    "block.",
+    "item.minecraft.",
+    "entity.minecraft.",
+    "biome.",
+    "effect.minecraft.",
+    "enchantment.minecraft.",
+    "trim_pattern.",
+    "upgrade.",
+    "filled_map",
+)
+LEGACY_INVALID_PATTERN = re.compile(
+    r"(block\.minecraft\.|item\.minecraft\.|entity\.minecraft\.)[^.]*\."
+)
+LEGACY_ITEM_EFFECT_PATTERN = re.compile(r"item\.minecraft\.[^.]*\.effect\.[^.]*")
+LEGACY_ADVANCEMENTS_PATTERN = re.compile(r"advancements\.(.*)\.title")
+LEGACY_EXCLUSIONS = {
+    "block.minecraft.set_spawn",
+    "entity.minecraft.falling_block_type",
+    "filled_map.id",
+    "filled_map.level",
+    "filled_map.locked",
+    "filled_map.scale",
+    "filled_map.unknown",
+}
+
+
+def make_language_data(size: int, seed: int = 0) -> LdataCo:
+    """
+    生成合成语言数据。
+
+    Args:
+        size (int): 键名数量
+        seed (int): 随机种子
+
+    Returns:
+        LdataCo: 合成的语言数据
+    """
+
+    rng = random.Random(seed)
+    en_us = {}
+    for i in range(size):
+        word = "".join(rng.choices(string.ascii_lowercase, k=8))
+        key = SYNTHETIC_KEYS[i % len(SYNTHETIC_KEYS)].format(f"{word}_{i}")
+        en_us[key] = f"{word.capitalize()} {i}"
+    data = {"en_us": en_us}
+    for lang in lang_list_table:
+        data[lang] = {k: f"{lang}:{v}" for k, v in en_us.items()}
+    return data
+
+
+def legacy_sort_data(lang_data: LdataCo, *categories: str) -> Dict[str, LdataTuple]:
+    """
+    旧版排序实现，仅用于对比。
+
+    Args:
+        lang_data (LdataCo): 语言数据
+        categories (str): （多个）分类
+
+    Returns:
+        Dict[str, LdataTuple]: 排序后的语言数据
+    """
+
+    sorted_data = {
+        "en_us": sorted(
+            (
+                (key, value)
+                for key, value in lang_data["en_us"].items()
+                if is_valid_key(key, *categories)
+            ),
+            key=lambda x: x[1],
+        )
+    }
+    sorted_keys = [item[0] for item in sorted_data["en_us"]]
+    for lang_name in lang_list_table:
+        sorted_data[lang_name] = sorted(
+            (
+                (key, value)
+                for key, value in lang_data[lang_name].items()
+                if is_valid_key(key, *categories)
+            ),
+            key=lambda x: sorted_keys.index(x[0]),
+        )
+    return sorted_data
+
+
+def legacy_classify_key(input_key: str) -> Optional[str]:
+    """
+    旧版键名分类实现，先逐条检查有效性，再逐个比较分类前缀，仅用于对比。
+
+    Args:
+        input_key (str): 键名
+
+    Returns:
+        Optional[str]: 分类名称，无效键名返回None
+    """
+
+    if not LEGACY_ADVANCEMENTS_PATTERN.match(input_key):
+        if not input_key.startswith(LEGACY_VALID_PREFIXES):
+            return None
+        if input_key in LEGACY_EXCLUSIONS or "pottery_shard" in input_key:
+            return None
+        if not LEGACY_ITEM_EFFECT_PATTERN.match(
+            input_key
+        ) and LEGACY_INVALID_PATTERN.match(input_key):
+            return None
+    for category, prefixes in LEGACY_PREFIXES.items():
+        if input_key.startswith(prefixes):
+            return category
+    return None
+
+
+def timeit(func: Callable[..., Any], *args: Any) -> float:
+    """
+    计时。
+
+    Args:
+        func (Callable[..., Any]): 待计时的函数
+        args (Any): 函数参数
+
+    Returns:
+        float: 耗时，秒
+    """
+
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def sort_each(
+    sorter: Callable[..., Dict[str, LdataTuple]], lang_data: LdataCo
+) -> List[Dict[str, LdataTuple]]:
+    """
+    逐分类排序。
+
+    Args:
+        sorter (Callable[..., Dict[str, LdataTuple]]): 排序函数
+        lang_data (LdataCo): 语言数据
+
+    Returns:
+        List[Dict[str, LdataTuple]]: 各分类排序后的语言数据
+    """
+
+    return [sorter(lang_data, category) for category in CATEGORIES]
+
+
+def bench_sort(scales: List[int]) -> None:
+    """
+    排序基准测试。
+
+    Args:
+        scales (List[int]): 合成数据规模
+    """
+
+    for size in scales:
+        data = make_language_data(size)
+        if size <= LEGACY_LIMIT:
+            for category in CATEGORIES:
+                assert sort_data(data, category) == legacy_sort_data(
+                    data, category
+                ), f"分类{category}的排序结果不一致。"
+            legacy = timeit(sort_each, legacy_sort_data, data)
+        else:
+            legacy = None
+        per_category = timeit(sort_each, sort_data, data)
+        shared = timeit(sort_categories, data, CATEGORIES)
+        print(
+            f"排序，{size}条键名×{len(lang_list)}种语言："
+            f"旧版{f'{legacy:.3f}秒' if legacy is not None else '（跳过）'}，"
+            f"逐分类{per_category:.3f}秒，共用遍历{shared:.3f}秒。"
+        )
+
+
+def classify_all(classifier: Callable[[str], Optional[str]], keys: List[str]) -> None:
+    """
+    多次对所有键名分类。
+
+    Args:
+        classifier (Callable[[str], Optional[str]]): 分类函数
+        keys (List[str]): 键名
+    """
+
+    for _ in range(CLASSIFY_ROUNDS):
+        for key in keys:
+            classifier(key)
+
+
+def bench_classify() -> None:
+    """
+    键名分类基准测试，优先使用语言文件文件夹中“en_us.json”的全部键名。
+    """
+
+    try:
+        with open(LANG_DIR / "en_us.json", "r", encoding="utf-8") as f:
+            keys = list(json.load(f))
+        source = "“en_us.json”"
+    except OSError:
+        keys = list(make_language_data(SCALES[-1])["en_us"])
+        source = "合成数据"
+    mismatches = [k for k in keys if classify_key(k) != legacy_classify_key(k)]
+    legacy = timeit(classify_all, legacy_classify_key, keys)
+    compiled = timeit(classify_all, classify_key, keys)
+    print(
+        f"键名分类，{source}中{len(keys)}条键名×{CLASSIFY_ROUNDS}次："
+        f"旧版{legacy:.3f}秒，合并正则表达式{compiled:.3f}秒，"
+        f"{len(mismatches)}条键名的分类不同。"
+    )
+    for key in mismatches[:10]:
+        print(f"  {key}：旧版{legacy_classify_key(key)}，现为{classify_key(key)}")
+
+
+def load_locales(loader: JsonBackend, paths: List[Path]) -> List[Any]:
+    """
+    多次读取各语言文件。
+
+    Args:
+        loader (JsonBackend): JSON读写后端
+        paths (List[Path]): 语言文件路径
+
+    Returns:
+        List[Any]: 最后一次读取的结果
+    """
+
+    results: List[Any] = []
+    for _ in range(JSON_ROUNDS):
+        results = [loader.load(path) for path in paths]
+    return results
+
+
+def locale_files(tmp: Path) -> Tuple[List[Path], str]:
+    """
+    获取基准测试所用的各语言文件，语言文件文件夹中缺少语言文件时生成合成数据。
+
+    Args:
+        tmp (Path): 存放合成数据的临时文件夹
+
+    Returns:
+        Tuple[List[Path], str]: 各语言文件路径与数据来源
+    """
+
+    paths = [LANG_DIR / file for file in lang_file_list]
+    if all(path.exists() for path in paths):
+        return paths, "语言文件文件夹"
+    data = make_language_data(SCALES[-1])
+    paths = [tmp / file for file in lang_file_list]
+    for lang, path in zip(lang_list, paths):
+        dump_json(data[lang], path, indent=4)
+    return paths, "合成数据"
+
+
+def bench_json() -> None:
+    """
+    读取语言文件的基准测试，比较已安装的各个JSON解析库。
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, source = locale_files(Path(tmp))
+        size = sum(path.stat().st_size for path in paths) / 1024**2
+        expected = load_locales(JsonBackend("json"), paths)
+        results = []
+        for name in available_backends():
+            loader = JsonBackend(name)
+            assert load_locales(loader, paths) == expected, f"{name}的解析结果不一致。"
+            elapsed = timeit(load_locales, loader, paths) / JSON_ROUNDS
+            results.append(f"{name}{elapsed:.3f}秒")
+    print(
+        f"读取{source}中{len(paths)}个语言文件（共{size:.1f} MiB）："
+        f"{'，'.join(results)}。"
+    )
+
+
+def measure_memory(func: Callable[..., Any], *args: Any) -> Tuple[Any, int, int]:
+    """
+    使用tracemalloc统计函数分配的内存。
+
+    Args:
+        func (Callable[..., Any]): 待统计的函数
+        args (Any): 函数参数
+
+    Returns:
+        Tuple[Any, int, int]: 函数返回值、返回时仍占用的内存与峰值内存，字节
+    """
+
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current, peak
+
+
+def load_as_dicts(paths: List[Path]) -> LdataCo:
+    """
+    将各语言文件读取为字典。
+
+    Args:
+        paths (List[Path]): 各语言文件路径
+
+    Returns:
+        LdataCo: 语言数据
+    """
+
+    return {lang: backend.load(path) for lang, path in zip(lang_list, paths)}
+
+
+def load_as_table(paths: List[Path]) -> StringTable:
+    """
+    读取各语言文件并建立字符串表，读取的字典随即释放。
+
+    Args:
+        paths (List[Path]): 各语言文件路径
+
+    Returns:
+        StringTable: 字符串表
+    """
+
+    return StringTable.from_language_data(load_as_dicts(paths))
+
+
+def legacy_sort_categories(
+    lang_data: LdataCo, categories: Tuple[str, ...]
+) -> Dict[str, Dict[str, LdataTuple]]:
+    """
+    旧版分类排序实现，为每个分类的每种语言生成键名与字符串的元组列表，仅用于对比。
+
+    Args:
+        lang_data (LdataCo): 语言数据
+        categories (Tuple[str, ...]): 分类名称
+
+    Returns:
+        Dict[str, Dict[str, LdataTuple]]: 各分类排序后的语言数据
+    """
+
+    en_us = lang_data["en_us"]
+    buckets: Dict[str, List[str]] = {name: [] for name in categories}
+    for key in en_us:
+        if (bucket := buckets.get(classify_key(key))) is not None:
+            bucket.append(key)
+    sorted_data = {}
+    for name, keys in buckets.items():
+        sorted_keys = sorted(keys, key=en_us.__getitem__)
+        sorted_data[name] = {
+            lang: [(key, lang_data[lang][key]) for key in sorted_keys]
+            for lang in lang_list
+        }
+    return sorted_data
+
+
+def bench_memory() -> None:
+    """
+    内存基准测试，比较字典与元组列表、字符串表与视图所占用的内存。
+    """
+
+    mib = 1024**2
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, source = locale_files(Path(tmp))
+        dicts, dict_size, dict_peak = measure_memory(load_as_dicts, paths)
+        table, table_size, table_peak = measure_memory(load_as_table, paths)
+    _, tuple_size, tuple_peak = measure_memory(
+        legacy_sort_categories, dicts, CATEGORIES
+    )
+    _, view_size, view_peak = measure_memory(sort_categories, table, CATEGORIES)
+    print(
+        f"内存，{source}中{len(table)}条键名×{len(lang_list)}种语言：\n"
+        f"  读取：字典{dict_size / mib:.1f} MiB（峰值{dict_peak / mib:.1f} MiB），"
+        f"字符串表{table_size / mib:.1f} MiB（峰值{table_peak / mib:.1f} MiB）\n"
+        f"  分类排序：元组列表{tuple_size / mib:.1f} MiB（峰值{tuple_peak / mib:.1f} MiB），"
+        f"视图{view_size / mib:.1f} MiB（峰值{view_peak / mib:.1f} MiB）"
+    )
+
+
+def make_images(folder: Path, names: List[str], seed: int = 0) -> None:
+    """
+    生成合成图片，尺寸随机。
+
+    Args:
+        folder (Path): 图片文件夹
+        names (List[str]): 图片名称（不含扩展名）
+        seed (int): 随机种子
+    """
+
+    rng = random.Random(seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        size = (rng.randint(16, 600), rng.randint(16, 600))
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", size, color).save(folder / f"{name}.png")
+
+
+def make_presentation(category: str, count: int) -> Presentation:
+    """
+    从模板创建包含指定数量幻灯片的演示文稿。
+
+    Args:
+        category (str): 分类名称
+        count (int): 幻灯片数量
+
+    Returns:
+        Presentation: 幻灯片对象
+    """
+
+    return replicate_slide(PPT_DIR / category / "template.pptx", count)
+
+
+def legacy_add_image(
+    slide_data: Dict[str, LdataTuple], category: str, prs: Presentation, root: Path
+) -> None:
+    """
+    旧版添加图片实现，仅用于对比。
+
+    Args:
+        slide_data (Dict[str, LdataTuple]): 幻灯片数据
+        category (str): 分类名称
+        prs (Presentation): 幻灯片对象
+        root (Path): 图片文件夹
+    """
+
+    for n, slide in enumerate(prs.slides):
+        img_path = root / category / f"{slide_data['en_us'][n][1]}.png"
+        if img_path.exists():
+            img = Image.open(img_path)
+            left, top, width, height = placement_box(*img.size)
+            slide.shapes.add_picture(str(img_path), left, top, width, height)
+
+
+def bench_add_image(size: int) -> None:
+    """
+    物品分类添加图片的基准测试。
+
+    Args:
+        size (int): 合成语言数据的键名数量
+    """
+
+    slide_data = sort_data(make_language_data(size), "item")
+    count = len(slide_data["en_us"])
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_images(root / "item", [value for _, value in slide_data["en_us"]])
+
+        legacy = timeit(
+            legacy_add_image, slide_data, "item", make_presentation("item", count), root
+        )
+        index = ImageIndex(root, root / "image_index.json")
+        cold = timeit(
+            add_image, slide_data, "item", make_presentation("item", count), index
+        )
+        index = ImageIndex(root, root / "image_index.json")
+        warm = timeit(
+            add_image, slide_data, "item", make_presentation("item", count), index
+        )
+    print(
+        f"添加图片，物品分类{count}张幻灯片："
+        f"旧版{legacy:.3f}秒，建立索引{cold:.3f}秒，使用已有索引{warm:.3f}秒。"
+    )
+
+
+def main() -> None:
+    """
+    主函数，运行基准测试。
+    """
+
+    parser = argparse.ArgumentParser(description="性能基准测试")
+    parser.add_argument(
+        "-b",
+        "--benchmark",
+        action="append",
+        choices=["sort", "classify", "json", "memory", "image"],
+        help="需要运行的基准测试，可多次指定，默认全部运行",
+    )
+    benchmarks = parser.parse_args().benchmark or [
+        "sort",
+        "classify",
+        "json",
+        "memory",
+        "image",
+    ]
+    if "sort" in benchmarks:
+        bench_sort(SCALES)
+    if "classify" in benchmarks:
+        bench_classify()
+    if "json" in benchmarks:
+        bench_json()
+    if "memory" in benchmarks:
+        bench_memory()
+    if "image" in benchmarks:
+        bench_add_image(IMAGE_SCALE)
+
+
+if __name__ == "__main__":
+    main()
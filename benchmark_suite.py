@@ -0,0 +1,269 @@
+# -*- encoding: utf-8 -*-
+"""
+可复现的基准测试套件，生成合成语言文件与图片，在子进程中使用独立的配置文件
+对读取、修正、排序、生成幻灯片与添加图片各阶段计时，结果按提交记录以便比较。
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from base import (
+    P,
+    CATEGORIES,
+    CONFIG_PATH,
+    PPT_DIR,
+    lang_file_list,
+    lang_list,
+    load_language_files,
+    sort_categories,
+    sort_data,
+)
+from benchmark import make_images, make_language_data, make_presentation
+from json_backend import dump_json
+from slide import add_image, edit_slide, update_language_data
+
+# 默认的合成数据规模
+SUITE_SCALES = [1_000, 10_000, 100_000]
+# 生成幻灯片与添加图片所用的分类
+SUITE_CATEGORY = "item"
+# 基准测试结果文件，每行一条记录
+RESULTS_PATH = P / "benchmark_results.jsonl"
+# 子进程使用的配置文件的环境变量
+CONFIG_ENV = "MC_SLIDE_CONFIG"
+
+
+def timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """
+    计时，并返回函数的返回值。
+
+    Args:
+        func (Callable[..., Any]): 待计时的函数
+        args (Any): 函数参数
+
+    Returns:
+        Tuple[Any, float]: 函数的返回值与耗时，秒
+    """
+
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def write_config(root: Path) -> Path:
+    """
+    以当前配置文件为基础，生成指向合成数据的配置文件。
+
+    Args:
+        root (Path): 合成数据所在文件夹
+
+    Returns:
+        Path: 配置文件路径
+    """
+
+    text = CONFIG_PATH.read_text(encoding="utf-8")
+    replacements = {
+        "language_folder": json.dumps((root / "lang").as_posix()),
+        "image_folder": json.dumps((root / "image").as_posix()),
+        "log_folder": json.dumps((root / "log").as_posix()),
+        "slide_folder": json.dumps((root / "ppt").as_posix()),
+        "cache_folder": json.dumps((root / "cache").as_posix()),
+        "ignore_supplements": "true",
+        "new_strings_only": "false",
+        "shard_size": "0",
+        "backend": '"auto"',
+        "timing": "false",
+        "cprofile": "false",
+        "tracemalloc": "false",
+    }
+    for key, value in replacements.items():
+        text = re.sub(
+            rf"^{key} = .*$", lambda _, v=value, k=key: f"{k} = {v}", text, flags=re.M
+        )
+    config_path = root / "configuration.toml"
+    config_path.write_text(text, encoding="utf-8")
+    return config_path
+
+
+def make_fixture(root: Path, size: int) -> Path:
+    """
+    生成合成语言文件、图片与模板幻灯片。
+
+    Args:
+        root (Path): 合成数据所在文件夹
+        size (int): 键名数量
+
+    Returns:
+        Path: 配置文件路径
+    """
+
+    data = make_language_data(size)
+    (root / "lang").mkdir(parents=True)
+    for lang, file in zip(lang_list, lang_file_list):
+        dump_json(data[lang], root / "lang" / file, indent=4)
+    slide_data = sort_data(data, SUITE_CATEGORY)
+    make_images(
+        root / "image" / SUITE_CATEGORY, [value for _, value in slide_data["en_us"]]
+    )
+    for category in CATEGORIES:
+        (root / "ppt" / category).mkdir(parents=True)
+        shutil.copy(PPT_DIR / category / "template.pptx", root / "ppt" / category)
+    return write_config(root)
+
+
+def run_stages() -> Dict[str, float]:
+    """
+    在使用合成数据配置文件的子进程中，对各阶段计时。
+
+    Returns:
+        Dict[str, float]: 各阶段耗时，秒
+    """
+
+    timings = {}
+    with redirect_stdout(io.StringIO()):
+        (data, _), timings["load_language_files"] = timed(
+            load_language_files, lang_file_list
+        )
+        data, timings["update_language_data"] = timed(update_language_data, data)
+        _, timings["sort_data"] = timed(sort_data, data, SUITE_CATEGORY)
+        views, timings["sort_categories"] = timed(sort_categories, data, CATEGORIES)
+        slide_data = views[SUITE_CATEGORY]
+        _, timings["edit_slide"] = timed(edit_slide, slide_data, SUITE_CATEGORY, True)
+        prs = make_presentation(SUITE_CATEGORY, len(slide_data["en_us"]))
+        _, timings["add_image"] = timed(add_image, slide_data, SUITE_CATEGORY, prs)
+    timings["slides"] = len(slide_data["en_us"])
+    return timings
+
+
+def git_commit() -> Tuple[Optional[str], bool]:
+    """
+    获取当前提交与工作区是否有未提交的修改。
+
+    Returns:
+        Tuple[Optional[str], bool]: 提交哈希值（不在Git仓库中时为None）与是否有修改
+    """
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=P,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=P,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status)
+
+
+def load_results() -> List[Dict[str, Any]]:
+    """
+    读取已有的基准测试结果。
+
+    Returns:
+        List[Dict[str, Any]]: 各条记录
+    """
+
+    if not RESULTS_PATH.exists():
+        return []
+    with open(RESULTS_PATH, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(record: Dict[str, Any], previous: List[Dict[str, Any]]) -> None:
+    """
+    输出本次结果，并与其他提交中相同规模的最近一条记录比较。
+
+    Args:
+        record (Dict[str, Any]): 本次结果
+        previous (List[Dict[str, Any]]): 已有的记录
+    """
+
+    baseline = next(
+        (
+            r
+            for r in reversed(previous)
+            if r["scale"] == record["scale"]
+            and (r["commit"], r["dirty"]) != (record["commit"], record["dirty"])
+        ),
+        None,
+    )
+    print(
+        f"{record['scale']}条键名（{SUITE_CATEGORY}分类{record['timings']['slides']}张幻灯片）"
+        + (f"，对比提交{baseline['commit']}：" if baseline else "：")
+    )
+    for stage, seconds in record["timings"].items():
+        if stage == "slides":
+            continue
+        line = f"  {stage}：{seconds:.3f}秒"
+        if baseline and (old := baseline["timings"].get(stage)):
+            line += f"（{(seconds - old) / old:+.1%}）"
+        print(line)
+
+
+def main() -> None:
+    """
+    主函数，运行基准测试套件。
+    """
+
+    parser = argparse.ArgumentParser(description="使用合成数据的基准测试套件")
+    parser.add_argument(
+        "-s",
+        "--scales",
+        type=int,
+        nargs="+",
+        default=SUITE_SCALES,
+        help="合成数据的键名数量，默认为1000、10000与100000",
+    )
+    parser.add_argument("--stages", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.stages:
+        print(json.dumps(run_stages()))
+        return
+
+    commit, dirty = git_commit()
+    previous = load_results()
+    for size in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = make_fixture(Path(tmp), size)
+            output = subprocess.run(
+                [sys.executable, __file__, "--stages"],
+                env={**os.environ, CONFIG_ENV: str(config_path)},
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        record = {
+            "commit": commit,
+            "dirty": dirty,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "scale": size,
+            "timings": json.loads(output.splitlines()[-1]),
+        }
+        compare(record, previous)
+        with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"结果已追加至“{RESULTS_PATH.name}”。")
+
+
+if __name__ == "__main__":
+    main()
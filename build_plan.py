@@ -0,0 +1,106 @@
+# -*- encoding: utf-8 -*-
+"""构建计划的读写与校验，输入文件与图片文件夹未变化时，生成阶段可直接使用其中的结果"""
+
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Optional, Set
+
+from base import CONFIG_PATH, IMAGE_DIR, PPT_DIR, file_digest
+from advancement_icon import ADVANCEMENTS_DATA_PATH
+from json_backend import load_json, save_json
+
+# 构建计划文件
+PLAN_PATH = PPT_DIR / "plan.json"
+# 构建计划格式版本，修改计划内容时需递增
+PLAN_VERSION = 1
+
+
+def list_images(folders: Iterable[str]) -> Dict[str, Set[str]]:
+    """
+    列出各图片分类文件夹中的图片，每个文件夹只列出一次，不读取图片。
+
+    Args:
+        folders (Iterable[str]): 图片分类
+
+    Returns:
+        Dict[str, Set[str]]: 各分类的图片文件名，文件夹不存在时为空集合
+    """
+
+    images: Dict[str, Set[str]] = {}
+    for folder in folders:
+        try:
+            with os.scandir(IMAGE_DIR / folder) as entries:
+                images[folder] = {
+                    entry.name
+                    for entry in entries
+                    if entry.name.endswith(".png") and entry.is_file()
+                }
+        except OSError:
+            images[folder] = set()
+    return images
+
+
+def listing_digest(names: Iterable[str]) -> str:
+    """
+    计算文件列表的哈希值，用于判断文件夹中是否有新增或移除的图片。
+
+    Args:
+        names (Iterable[str]): 文件名
+
+    Returns:
+        str: 十六进制哈希值
+    """
+
+    return hashlib.sha256("\n".join(sorted(names)).encode("utf-8")).hexdigest()
+
+
+def inputs_digest(language: str) -> str:
+    """
+    计算构建计划所依据的语言数据、配置文件与进度数据的哈希值。
+
+    Args:
+        language (str): 语言数据缓存的键，与读取语言数据时共用，语言文件只需计算一次哈希值
+
+    Returns:
+        str: 十六进制哈希值
+    """
+
+    h = hashlib.sha256(language.encode())
+    h.update(file_digest(CONFIG_PATH, ADVANCEMENTS_DATA_PATH).encode())
+    return h.hexdigest()
+
+
+def load_plan(language: str) -> Optional[Dict[str, Any]]:
+    """
+    读取构建计划，并检查其依据的文件与图片文件夹是否有变化。
+
+    Args:
+        language (str): 读取语言数据时已计算的语言数据缓存的键
+
+    Returns:
+        Optional[Dict[str, Any]]: 构建计划，若不存在或已失效则返回None
+    """
+
+    plan = load_json(PLAN_PATH, {})
+    if plan.get("version") != PLAN_VERSION or plan.get("inputs") != inputs_digest(
+        language
+    ):
+        return None
+    images = list_images(plan["images"])
+    if any(
+        listing_digest(images[folder]) != digest
+        for folder, digest in plan["images"].items()
+    ):
+        return None
+    return plan
+
+
+def save_plan(plan: Dict[str, Any]) -> None:
+    """
+    写入构建计划。
+
+    Args:
+        plan (Dict[str, Any]): 构建计划
+    """
+
+    save_json({"version": PLAN_VERSION, **plan}, PLAN_PATH, indent=4)
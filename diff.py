@@ -1,74 +1,174 @@
 # -*- encoding: utf-8 -*-
-"""检查新增字符串"""
-
-import json
-import re
-from typing import Tuple, Dict, Set
-from base import P, LANG_DIR
-
-# 定义常量
-PREFIXES: Tuple[str, ...] = (
-    "block.",
-    "item.minecraft.",
-    "entity.minecraft.",
-    "biome.",
-    "effect.minecraft.",
-    "enchantment.minecraft.",
-    "trim_pattern.",
-    "upgrade.",
-    "filled_map",
-)
-INVALID_BLOCK_ITEM_ENTITY_PATTERN = re.compile(
-    r"(block\.minecraft\.|item\.minecraft\.|entity\.minecraft\.)[^.]*\."
+"""检查各版本之间新增、移除与修改的字符串"""
+
+import argparse
+import hashlib
+from pathlib import Path
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from base import (
+    P,
+    LANG_DIR,
+    DIFF_VERSIONS,
+    CHANGELOG_PATH,
+    classify_key,
+    lang_list,
+    new_strings,
+    Ldata,
 )
-ITEM_EFFECT_PATTERN = re.compile(r"item\.minecraft\.[^.]*\.effect\.[^.]*")
-ADVANCEMENTS_TITLE_PATTERN = re.compile(r"advancements\.(.*)\.title")
-EXCLUSIONS: Set[str] = {
-    "block.minecraft.set_spawn",
-    "entity.minecraft.falling_block_type",
-    "filled_map.id",
-    "filled_map.level",
-    "filled_map.locked",
-    "filled_map.scale",
-    "filled_map.unknown",
-}
-
-
-def is_valid_key(translation_key: str) -> bool:
+from json_backend import dump_json
+from json_stream import iter_language_file
+
+
+def value_digest(value: str) -> bytes:
+    """
+    计算字符串的摘要，用于比较字符串是否被修改，无需保留旧版本的字符串。
+
+    Args:
+        value (str): 字符串
+
+    Returns:
+        bytes: 摘要
+    """
+
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+
+
+def diff_locale(paths: List[Optional[Path]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    依次比较某一语言在各版本中的语言文件，每个文件只流式读取一次。
+    内存中仅保留上一版本的键名与字符串摘要。
+
+    Args:
+        paths (List[Optional[Path]]): 各版本的语言文件路径，版本中不存在该语言时为None
+
+    Returns:
+        List[Optional[Dict[str, Any]]]: 相邻两个版本之间新增、移除与修改的字符串，
+            任一版本中不存在该语言时为None
+    """
+
+    changes: List[Optional[Dict[str, Any]]] = []
+    previous: Optional[Dict[str, bytes]] = None
+    for n, path in enumerate(paths):
+        current: Optional[Dict[str, bytes]] = None
+        added: Ldata = {}
+        changed: Ldata = {}
+        if path is not None:
+            current = {}
+            for key, value in iter_language_file(path):
+                digest = current[key] = value_digest(value)
+                if previous is None:
+                    continue
+                # 从上一版本中取出，剩余的即为被移除的键名
+                old = previous.pop(key, None)
+                if old is None:
+                    added[key] = value
+                elif old != digest:
+                    changed[key] = value
+        if n > 0:
+            changes.append(
+                {"added": added, "removed": sorted(previous), "changed": changed}
+                if previous is not None and current is not None
+                else None
+            )
+        previous = current
+    return changes
+
+
+def locale_paths(version: Path) -> Dict[str, Optional[Path]]:
+    """
+    获取某一版本中各语言文件的路径。
+
+    Args:
+        version (Path): 版本文件夹
+
+    Returns:
+        Dict[str, Optional[Path]]: 各语言文件的路径，不存在时为None
+    """
+
+    return {
+        lang: path if (path := version / f"{lang}.json").exists() else None
+        for lang in lang_list
+    }
+
+
+def build_changelog(versions: List[Path]) -> Dict[str, Any]:
     """
-    判断是否为有效键名。
+    生成各版本之间的变更记录。
 
     Args:
-        translation_key (str): 需要验证的键名
+        versions (List[Path]): 按时间顺序排列的版本文件夹
 
     Returns:
-        bool: 如果键名有效，返回 True；否则返回 False
+        Dict[str, Any]: 变更记录
     """
 
-    if ADVANCEMENTS_TITLE_PATTERN.match(translation_key):
-        return True
-    if not translation_key.startswith(PREFIXES):
-        return False
-    if translation_key in EXCLUSIONS or "pottery_shard" in translation_key:
-        return False
-    if ITEM_EFFECT_PATTERN.match(translation_key):
-        return True
-    if INVALID_BLOCK_ITEM_ENTITY_PATTERN.match(translation_key):
-        return False
-    return True
-
-
-# 修改语言文件
-with open(P / "en_us.json", "r", encoding="utf-8") as l:
-    data_old: Dict[str, str] = json.load(l)
-edited_data: Dict[str, str] = {k: v for k, v in data_old.items() if is_valid_key(k)}
-print("已提取旧“en_us.json”的有效字符串。")
-
-with open(LANG_DIR / "en_us.json", "r", encoding="utf-8") as l:
-    data_new: Dict[str, str] = json.load(l)
-
-diff_data = {k: v for k, v in data_new.items() if k not in data_old}
-
-with open(P / "en_us_diff.json", "w", encoding="utf-8") as l:
-    json.dump(diff_data, l, ensure_ascii=False, indent=4)
-print("已提取“en_us.json”中新增的字符串。")
+    paths = [locale_paths(version) for version in versions]
+    steps: List[Dict[str, Any]] = [
+        {"from": version_name(old), "to": version_name(new), "locales": {}}
+        for old, new in zip(versions, versions[1:])
+    ]
+    for lang in lang_list:
+        for step, change in zip(steps, diff_locale([p[lang] for p in paths])):
+            if change is not None:
+                step["locales"][lang] = change
+    return {"versions": [version_name(version) for version in versions], "steps": steps}
+
+
+def version_name(version: Path) -> str:
+    """
+    获取版本名称，即版本文件夹相对于脚本所在文件夹的路径。
+
+    Args:
+        version (Path): 版本文件夹
+
+    Returns:
+        str: 版本名称
+    """
+
+    try:
+        return version.resolve().relative_to(P).as_posix()
+    except ValueError:
+        return version.as_posix()
+
+
+def main() -> None:
+    """
+    主函数，比较各版本的语言文件，并输出变更记录与新增的英文字符串。
+    """
+
+    parser = argparse.ArgumentParser(
+        description="检查各版本之间新增、移除与修改的字符串"
+    )
+    parser.add_argument(
+        "versions",
+        nargs="*",
+        type=Path,
+        help="按时间顺序排列的版本文件夹，默认使用配置文件中的设置",
+    )
+    versions = parser.parse_args().versions or DIFF_VERSIONS or [P, LANG_DIR]
+    if len(versions) < 2:
+        parser.error("至少需要两个版本。")
+
+    changelog = build_changelog(versions)
+    dump_json(changelog, CHANGELOG_PATH, separators=(",", ":"))
+    for step in changelog["steps"]:
+        summary = "，".join(
+            f"{lang}新增{len(c['added'])}条、移除{len(c['removed'])}条、修改{len(c['changed'])}条"
+            for lang, c in step["locales"].items()
+        )
+        print(f"{step['from']} → {step['to']}：{summary or '无可比较的语言文件'}。")
+    print(f"已输出变更记录至“{CHANGELOG_PATH.name}”。")
+
+    diff_data = new_strings(changelog)
+    dump_json(diff_data, P / "en_us_diff.json", indent=4)
+    print("已提取“en_us.json”中新增的字符串。")
+    counts = Counter(classify_key(key) for key in diff_data)
+    counts.pop(None, None)
+    summary = "，".join(f"{category}{n}条" for category, n in sorted(counts.items()))
+    print(f"其中有效字符串：{summary or '无'}。")
+
+
+if __name__ == "__main__":
+    main()
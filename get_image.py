@@ -2,88 +2,555 @@
 """从Minecraft Wiki获取等轴渲染图的脚本"""
 
 import time
-import json
+import argparse
+import hashlib
 import logging
-from typing import Optional, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+from urllib.parse import urlsplit
 
 import requests
-from requests.exceptions import SSLError, ReadTimeout, RequestException
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (
+    ConnectionError as RequestsConnectionError,
+    ReadTimeout,
+    RequestException,
+    SSLError,
+)
 
 from base import (
     LOG_DIR,
     IMAGE_DIR,
+    CACHE_DIR,
     IGNORE_CATEGORIES,
     IGNORE_SAVED_IMAGE,
+    MAX_WORKERS,
+    REQUESTS_PER_SECOND,
+    TITLE_TTL_DAYS,
+    MISSING_TITLE_TTL_DAYS,
     is_valid_key,
-    language_data,
+    store,
     Ldata,
     LdataTuple,
 )
+from json_backend import backend, load_json, save_json
+
+# Minecraft Wiki API地址
+API_URL = "https://minecraft.wiki/api.php"
+# 最大重试次数
+MAX_RETRIES = 3
+# 需要重试的HTTP状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 遇到限制或服务器错误时的初始等待时间，秒，每次重试加倍
+BACKOFF_SECONDS = 5
+# 每次 imageinfo 查询的最大标题数
+BATCH_SIZE = 50
+# 每天的秒数
+DAY_SECONDS = 86400
 
 
-def get_image_url(wiki_file_name: str) -> Optional[str]:
+def retry_after(response: requests.Response) -> Optional[float]:
     """
-    获取Minecraft Wiki上图片原始文件的URL
+    读取响应的 Retry-After 头，支持秒数与HTTP日期两种格式。
 
     Args:
-        wiki_file_name (str): Wiki文件名
+        response (requests.Response): 响应
 
     Returns:
-        Optional[str]: 图片的URL，如果未找到则返回None
+        Optional[float]: 需要等待的秒数，若无该响应头或无法解析则返回None
     """
 
-    params = {
-        "action": "query",
-        "titles": f"File:{wiki_file_name}",
-        "prop": "imageinfo",
-        "iiprop": "url",
-        "format": "json",
-    }
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
-    response = requests.get("https://minecraft.wiki/api.php", params=params, timeout=60)
-    data = response.json()
 
-    # 获取图片信息
-    pages = data["query"]["pages"]
-    for page_info in pages.values():
-        image_info = page_info.get("imageinfo", [])
-        if image_info:
-            return image_info[0]["url"]
-    return None
+class RateLimiter:
+    """按主机限制请求频率，线程安全。"""
 
+    def __init__(self, requests_per_second: float) -> None:
+        self._interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
 
-if __name__ == "__main__":
-    # 日志
-    LOG_DIR.mkdir(exist_ok=True)
-    log_file_name = f"image_download_{time.strftime('%Y%m%d%H%M%S')}.log"
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(LOG_DIR / log_file_name, encoding="utf-8"),
-        ],
+    def wait(self, url: str) -> None:
+        """
+        等待直到可以向该URL所在主机发送请求。
+
+        Args:
+            url (str): 请求的URL
+        """
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, url: str, seconds: float) -> None:
+        """
+        推迟该URL所在主机的后续请求。
+
+        Args:
+            url (str): 请求的URL
+            seconds (float): 推迟的秒数
+        """
+
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            self._next_slot[host] = max(self._next_slot.get(host, now), now + seconds)
+
+
+class ImageManifest:
+    """记录已保存图片的来源URL、缓存校验信息与内容哈希值，线程安全。"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path, {})
+
+    def _name(self, file_path: Path) -> str:
+        """图片在清单中的名称，即相对于清单所在文件夹的路径"""
+        return file_path.relative_to(self.path.parent).as_posix()
+
+    def conditional_headers(self, url: str, file_path: Path) -> Dict[str, str]:
+        """
+        获取条件请求头，仅当图片来源未变且本地文件完好时有效。
+
+        Args:
+            url (str): 图片的URL
+            file_path (Path): 图片保存路径
+
+        Returns:
+            Dict[str, str]: 条件请求头，可能为空
+        """
+
+        with self._lock:
+            entry = self._entries.get(self._name(file_path))
+        if (
+            not entry
+            or entry["url"] != url
+            or not file_path.is_file()
+            or file_path.stat().st_size != entry["size"]
+        ):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, file_path: Path, response: requests.Response) -> None:
+        """
+        记录新保存的图片。
+
+        Args:
+            url (str): 图片的URL
+            file_path (Path): 图片保存路径
+            response (requests.Response): 图片的响应
+        """
+
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "size": len(response.content),
+            "sha256": hashlib.sha256(response.content).hexdigest(),
+        }
+        with self._lock:
+            self._entries[self._name(file_path)] = entry
+
+    def save(self) -> None:
+        """保存清单。"""
+        with self._lock:
+            entries = dict(sorted(self._entries.items()))
+        save_json(entries, self.path, indent=4)
+
+
+class TitleCache:
+    """
+    缓存Wiki文件名解析为图片URL的结果，未找到的文件也会记录，每条记录有各自的过期时间，线程安全。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_days: float = TITLE_TTL_DAYS,
+        missing_ttl_days: float = MISSING_TITLE_TTL_DAYS,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl_days * DAY_SECONDS
+        self.missing_ttl = missing_ttl_days * DAY_SECONDS
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path, {})
+
+    def lookup(
+        self, wiki_file_names: Iterable[str]
+    ) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """
+        查找未过期的解析结果。
+
+        Args:
+            wiki_file_names (Iterable[str]): Wiki文件名
+
+        Returns:
+            Tuple[Dict[str, Optional[str]], List[str]]: 命中的文件名与图片URL（未找到的为None），
+                以及需要查询的文件名
+        """
+
+        now = time.time()
+        hits: Dict[str, Optional[str]] = {}
+        misses = []
+        with self._lock:
+            for name in wiki_file_names:
+                entry = self._entries.get(name)
+                if entry is not None and entry["expires"] > now:
+                    hits[name] = entry["url"]
+                else:
+                    misses.append(name)
+        return hits, misses
+
+    def store(self, urls: Dict[str, Optional[str]]) -> None:
+        """
+        记录查询结果。
+
+        Args:
+            urls (Dict[str, Optional[str]]): 文件名与图片URL，未找到的为None
+        """
+
+        now = time.time()
+        with self._lock:
+            for name, url in urls.items():
+                ttl = self.ttl if url else self.missing_ttl
+                if ttl > 0:
+                    self._entries[name] = {"url": url, "expires": int(now + ttl)}
+
+    def invalidate(
+        self,
+        wiki_file_names: Optional[Iterable[str]] = None,
+        missing_only: bool = False,
+    ) -> int:
+        """
+        清除记录。
+
+        Args:
+            wiki_file_names (Optional[Iterable[str]]): 需要清除的文件名，为None时清除全部
+            missing_only (bool): 是否只清除未找到的记录
+
+        Returns:
+            int: 清除的记录数
+        """
+
+        with self._lock:
+            names = list(self._entries if wiki_file_names is None else wiki_file_names)
+            removed = [
+                name
+                for name in names
+                if name in self._entries
+                and not (missing_only and self._entries[name]["url"])
+            ]
+            for name in removed:
+                del self._entries[name]
+        return len(removed)
+
+    def save(self) -> None:
+        """移除过期的记录并保存缓存。"""
+        now = time.time()
+        with self._lock:
+            entries = {
+                name: entry
+                for name, entry in sorted(self._entries.items())
+                if entry["expires"] > now
+            }
+        save_json(entries, self.path, indent=4)
+
+
+class ImageFetcher:
+    """并发获取图片，共用连接池与按主机的频率限制。"""
+
+    def __init__(
+        self,
+        api_url: str = API_URL,
+        max_workers: int = MAX_WORKERS,
+        requests_per_second: float = REQUESTS_PER_SECOND,
+        manifest: Optional[ImageManifest] = None,
+        titles: Optional[TitleCache] = None,
+    ) -> None:
+        self.api_url = api_url
+        self.manifest = manifest or ImageManifest(IMAGE_DIR / "image_manifest.json")
+        self.titles = titles or TitleCache(CACHE_DIR / "image_titles.json")
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(requests_per_second)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        发送GET请求，遇到限制、超时、连接错误或服务器错误时推迟该主机的请求并重试，
+        等待时间每次加倍，服务器指定 Retry-After 时按其等待。
+
+        Args:
+            url (str): 请求的URL
+            kwargs (Any): 传递给 requests 的其他参数
+
+        Returns:
+            requests.Response: 响应
+        """
+
+        retries = 0
+        while True:
+            self.limiter.wait(url)
+            backoff = BACKOFF_SECONDS * 2**retries
+            try:
+                response = self.session.get(url, timeout=60, **kwargs)
+            except SSLError as e:
+                logging.error("遇到SSL错误：%s", e)
+                delay = 3 * backoff
+                logging.warning("服务器限制获取，将在%d秒后尝试再次获取……", delay)
+            except ReadTimeout as e:
+                logging.error("获取超时：%s", e)
+                delay = backoff
+                logging.warning("将在%d秒后尝试再次获取……", delay)
+            except RequestsConnectionError as e:
+                logging.error("连接错误：%s", e)
+                delay = backoff
+                logging.warning("将在%d秒后尝试再次获取……", delay)
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+                logging.error("服务器返回状态码%d。", response.status_code)
+                delay = retry_after(response)
+                if delay is None:
+                    delay = backoff
+                logging.warning("将在%d秒后尝试再次获取……", delay)
+            retries += 1
+            if retries >= MAX_RETRIES:
+                logging.error("达到最大重试次数，终止操作。")
+                raise RequestException(f"达到最大重试次数：{url}")
+            self.limiter.backoff(url, delay)
+
+    def get_image_urls(
+        self, wiki_file_names: Iterable[str]
+    ) -> Dict[str, Optional[str]]:
+        """
+        批量获取Minecraft Wiki上图片原始文件的URL，优先使用标题解析缓存，
+        其余的每次请求最多查询50个文件。
+
+        Args:
+            wiki_file_names (Iterable[str]): Wiki文件名
+
+        Returns:
+            Dict[str, Optional[str]]: 文件名与图片URL，未找到的为None，请求失败的文件名不包含在内
+        """
+
+        urls, names = self.titles.lookup(dict.fromkeys(wiki_file_names))
+        logging.info(
+            "标题解析缓存命中%d个文件名，需要查询%d个。", len(urls), len(names)
+        )
+        batches = [names[i : i + BATCH_SIZE] for i in range(0, len(names), BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for result in executor.map(self._query_image_urls, batches):
+                urls.update(result)
+        return urls
+
+    def _query_image_urls(self, wiki_file_names: List[str]) -> Dict[str, Optional[str]]:
+        """
+        发送一次批量 imageinfo 查询，成功时将结果写入标题解析缓存，请求失败的结果不会缓存。
+
+        Args:
+            wiki_file_names (List[str]): Wiki文件名，不超过50个
+
+        Returns:
+            Dict[str, Optional[str]]: 文件名与图片URL，未找到的为None，请求失败时为空字典
+        """
+
+        params = {
+            "action": "query",
+            "titles": "|".join(f"File:{name}" for name in wiki_file_names),
+            "prop": "imageinfo",
+            "iiprop": "url",
+            "format": "json",
+        }
+        try:
+            result = self.get(self.api_url, params=params).json()
+        except (RequestException, ValueError) as e:
+            logging.error("请求异常：%s", e)
+            return {}
+        if "query" not in result:
+            # API返回错误时没有查询结果，不能视为文件不存在
+            logging.error("查询失败：%s", result.get("error", result))
+            return {}
+        query = result["query"]
+
+        # 请求的标题可能被规范化（如下划线转为空格）
+        normalized = {n["from"]: n["to"] for n in query.get("normalized", [])}
+        # 获取图片信息，不存在的页面没有 imageinfo
+        found = {
+            page["title"]: page["imageinfo"][0]["url"]
+            for page in query.get("pages", {}).values()
+            if page.get("imageinfo")
+        }
+        urls = {
+            name: found.get(normalized.get(f"File:{name}", f"File:{name}"))
+            for name in wiki_file_names
+        }
+        self.titles.store(urls)
+        return urls
+
+    def get_image_url(self, wiki_file_name: str) -> Optional[str]:
+        """
+        获取Minecraft Wiki上图片原始文件的URL
+
+        Args:
+            wiki_file_name (str): Wiki文件名
+
+        Returns:
+            Optional[str]: 图片的URL，如果未找到或请求失败则返回None
+        """
+
+        return self.get_image_urls([wiki_file_name]).get(wiki_file_name)
+
+    def download_image(self, url: str, file_path: Path) -> None:
+        """
+        下载并保存单张图片。
+
+        Args:
+            url (str): 图片的URL
+            file_path (Path): 图片保存路径
+        """
+
+        logging.info("正在获取图片%s。", file_path.name)
+        logging.info("原始文件的URL：%s", url)
+        headers = self.manifest.conditional_headers(url, file_path)
+        try:
+            response = self.get(url, headers=headers)
+        except RequestException as e:
+            logging.error("请求异常：%s", e)
+            return
+        if response.status_code == 304:
+            logging.info("图片%s未发生变化。", file_path.name)
+            return
+        with open(file_path, "wb") as f:
+            f.write(response.content)
+        self.manifest.record(url, file_path, response)
+        logging.info("图片%s已成功保存。", file_path.name)
+
+    def fetch_images(
+        self, items: List[Tuple[str, str, Path]], image_mapping: Ldata
+    ) -> List[str]:
+        """
+        批量查找图片URL，再并发下载。
+
+        Args:
+            items (List[Tuple[str, str, Path]]): 键名、源字符串与图片保存路径
+            image_mapping (Ldata): 图片映射
+
+        Returns:
+            List[str]: 未找到或查询失败的图片文件名，顺序与输入一致
+        """
+
+        candidates = [
+            image_candidates(key, value, path, image_mapping)
+            for key, value, path in items
+        ]
+        urls = self.get_image_urls(name for names in candidates for name in names)
+
+        unknown, downloads = [], []
+        for (_, _, path), names in zip(items, candidates):
+            url = next((urls[name] for name in names if urls.get(name)), None)
+            if url:
+                downloads.append((url, path))
+                continue
+            if all(name in urls for name in names):
+                logging.warning("未找到%s。", path.name)
+            else:
+                logging.warning("查询%s失败，请稍后重试。", path.name)
+            unknown.append(path.name)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda d: self.download_image(*d), downloads))
+        self.manifest.save()
+        self.titles.save()
+        return unknown
+
+
+def image_candidates(
+    key: str, value: str, file_path: Path, image_mapping: Ldata
+) -> List[str]:
+    """
+    按优先级列出图片可能对应的Wiki文件名。
+
+    Args:
+        key (str): 键名
+        value (str): 源字符串
+        file_path (Path): 图片保存路径
+        image_mapping (Ldata): 图片映射
+
+    Returns:
+        List[str]: Wiki文件名，靠前的优先
+    """
+
+    mapped_name = image_mapping.get(key, file_path.name)
+    if "Waxed" in value:
+        first = f"{value[6:]}.png"
+    elif file_path.parent.name == "item":
+        first = f"{value}_(item).png"
+    else:
+        first = mapped_name
+    return list(dict.fromkeys([first, mapped_name]))
+
+
+def main() -> None:
+    """
+    主函数，获取所有需要的图片。
+    """
+
+    parser = argparse.ArgumentParser(description="从Minecraft Wiki获取图片")
+    parser.add_argument(
+        "--invalidate",
+        nargs="*",
+        metavar="FILE",
+        help="清除标题解析缓存中指定Wiki文件名的记录，不指定文件名时清除全部",
+    )
+    parser.add_argument(
+        "--retry-missing",
+        action="store_true",
+        help="清除标题解析缓存中未找到的记录，重新查询",
     )
+    args = parser.parse_args()
 
     sorted_items: LdataTuple = [
         (key, value)
-        for key, value in language_data.items()
+        for key, value in store.language_data.items()
         if (is_valid_key(key, "block") and not IGNORE_CATEGORIES["block"])
         or (is_valid_key(key, "entity") and not IGNORE_CATEGORIES["entity"])
-        or (is_valid_key(key, "item", "filled_map") and not IGNORE_CATEGORIES["item"])
+        or (is_valid_key(key, "item") and not IGNORE_CATEGORIES["item"])
         or (is_valid_key(key, "effect") and not IGNORE_CATEGORIES["effect"])
     ]
 
     # 创建图片文件夹（若不存在）
     IMAGE_DIR.mkdir(exist_ok=True)
 
-    # 未获取到的图片
-    unknown: List[str] = []
-
     # 读取图片映射
-    with open(IMAGE_DIR / "image_mapping.json", "r", encoding="utf-8") as f:
-        image_mapping: Ldata = json.load(f)
+    image_mapping: Ldata = backend.load(IMAGE_DIR / "image_mapping.json")
 
+    items = []
     for key, value in sorted_items:
         key_type = "item" if key.split(".")[0] == "filled_map" else key.split(".")[0]
         (IMAGE_DIR / key_type).mkdir(exist_ok=True)
@@ -94,54 +561,17 @@ if __name__ == "__main__":
         if file_path.is_file() and not IGNORE_SAVED_IMAGE:
             logging.info("%s已经存在。", file_name)
             continue
+        items.append((key, value, file_path))
 
-        url = (
-            get_image_url(f"{value}_(item).png")
-            if key_type == "item"
-            else get_image_url(image_mapping.get(key, file_name))
+    fetcher = ImageFetcher()
+    if args.invalidate is not None or args.retry_missing:
+        removed = fetcher.titles.invalidate(
+            args.invalidate or None, missing_only=args.retry_missing
         )
-        if "Waxed" in value:
-            url = get_image_url(f"{value[6:]}.png")
-        if not url:
-            url = get_image_url(image_mapping.get(key, file_name))
-
-        # 获取图片
-        MAX_RETRIES = 3  # 最大重试次数
-        if url:
-            logging.info("正在获取图片%s。", file_name)
-            logging.info("原始文件的URL：%s", url)
-
-            RETRIES = 0
-            while RETRIES < MAX_RETRIES:
-                try:
-                    with open(file_path, "wb") as f:
-                        f.write(requests.get(url, timeout=60).content)
-                    logging.info("图片已成功保存。")
-                    break
-                except SSLError as e:
-                    logging.error("遇到SSL错误：%s", e)
-                    if RETRIES < MAX_RETRIES - 1:
-                        logging.warning("服务器限制获取，将在15秒后尝试再次获取……")
-                        time.sleep(15)
-                        RETRIES += 1
-                    else:
-                        logging.error("达到最大重试次数，终止操作。")
-                        break
-                except ReadTimeout as e:
-                    logging.error("获取超时：%s", e)
-                    if RETRIES < MAX_RETRIES - 1:
-                        logging.warning("将在5秒后尝试再次获取……")
-                        time.sleep(5)
-                        RETRIES += 1
-                    else:
-                        logging.error("达到最大重试次数，终止操作。")
-                        break
-                except RequestException as e:
-                    logging.error("请求异常：%s", e)
-                    break
-        else:
-            logging.warning("未找到%s。", file_name)
-            unknown.append(file_name)
+        logging.info("已清除%d条标题解析缓存记录。", removed)
+
+    # 未获取到的图片
+    unknown = fetcher.fetch_images(items, image_mapping)
 
     # 输出未找到的图片列表
     if unknown:
@@ -150,3 +580,18 @@ if __name__ == "__main__":
             logging.warning(i)
     else:
         logging.info("所有图片已下载完成。")
+
+
+if __name__ == "__main__":
+    # 日志
+    LOG_DIR.mkdir(exist_ok=True)
+    log_file_name = f"image_download_{time.strftime('%Y%m%d%H%M%S')}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler(LOG_DIR / log_file_name, encoding="utf-8"),
+        ],
+    )
+    main()
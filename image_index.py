@@ -0,0 +1,330 @@
+# -*- encoding: utf-8 -*-
+"""图片元数据索引，避免生成幻灯片时逐张打开图片"""
+
+import io
+import math
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import Image as PptxImage, ImagePart
+from pptx.presentation import Presentation
+from pptx.slide import Slide
+from pptx.util import Cm
+
+from base import IMAGE_DIR, CACHE_DIR
+from json_backend import load_json, save_json
+
+# 图片位置与大小（EMU）
+Box = Tuple[int, int, int, int]
+# 图片的分类、文件名与位置大小，位置大小为None时按图片尺寸计算
+ImageSpec = Tuple[str, str, Optional[Box]]
+# 导出视频时每厘米的像素数，3840像素对应幻灯片宽度33.867厘米
+RENDER_PX_PER_CM = 3840 / 33.867
+# 图片的最大显示尺寸（8×12厘米）在导出视频时对应的像素数
+MAX_RENDER_SIZE = (math.ceil(8 * RENDER_PX_PER_CM), math.ceil(12 * RENDER_PX_PER_CM))
+# 优化后的图片所在文件夹，文件名为原图的SHA1哈希值
+MEDIA_CACHE_DIR = CACHE_DIR / "media"
+
+
+def placement_box(img_width: int, img_height: int) -> Box:
+    """
+    计算图片在幻灯片中的位置与大小，高度不超过12厘米，宽度不超过8厘米。
+
+    Args:
+        img_width (int): 图片宽度，像素
+        img_height (int): 图片高度，像素
+
+    Returns:
+        Box: 左边距、上边距、宽度与高度，EMU
+    """
+
+    img_width_cm = img_width / 72 * 2.54
+    img_height_cm = img_height / 72 * 2.54
+
+    if img_height_cm > 12:
+        img_width_cm *= 12 / img_height_cm
+        img_height_cm = 12
+    if img_width_cm > 8:
+        img_height_cm *= 8 / img_width_cm
+        img_width_cm = 8
+
+    return (
+        Cm(28.57 - img_width_cm / 2),
+        Cm((19.05 - img_height_cm) / 2 + 0.38),
+        Cm(img_width_cm),
+        Cm(img_height_cm),
+    )
+
+
+def optimized_path(sha1: str) -> Path:
+    """
+    获取优化后的图片路径。
+
+    Args:
+        sha1 (str): 原图的SHA1哈希值
+
+    Returns:
+        Path: 优化后的图片路径
+    """
+
+    return MEDIA_CACHE_DIR / f"{sha1}.png"
+
+
+def optimize_image(img_path: Path, sha1: str) -> int:
+    """
+    无损重新压缩图片，超出最大显示尺寸时按比例缩小，结果不比原图小时保留原图。
+
+    Args:
+        img_path (Path): 原图路径
+        sha1 (str): 原图的SHA1哈希值
+
+    Returns:
+        int: 节省的字节数
+    """
+
+    original = img_path.stat().st_size
+    target = optimized_path(sha1)
+    if target.exists():
+        return original - target.stat().st_size
+    with Image.open(img_path) as img:
+        if img.width > MAX_RENDER_SIZE[0] or img.height > MAX_RENDER_SIZE[1]:
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                img = img.convert("RGBA")
+            img.thumbnail(MAX_RENDER_SIZE, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG", optimize=True)
+    blob = buffer.getvalue()
+    if len(blob) >= original:
+        blob = img_path.read_bytes()
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f"{target.name}.tmp")
+    tmp_path.write_bytes(blob)
+    tmp_path.replace(target)
+    return original - len(blob)
+
+
+def dedupe_media(prs: Presentation) -> Tuple[int, int]:
+    """
+    合并演示文稿中内容相同的图片部件，保证每种图片只保存一份。
+
+    Args:
+        prs (Presentation): 幻灯片对象
+
+    Returns:
+        Tuple[int, int]: 合并后的图片部件数与因合并节省的字节数
+    """
+
+    canonical: Dict[str, ImagePart] = {}
+    merged = set()
+    for part in list(prs.part.package.iter_parts()):
+        for rel in part.rels.values():
+            if rel.is_external or not isinstance(rel.target_part, ImagePart):
+                continue
+            image_part = rel.target_part
+            first = canonical.setdefault(image_part.sha1, image_part)
+            if first is not image_part:
+                rel._target = first  # pylint: disable=protected-access
+                merged.add(image_part)
+    return len(canonical), sum(len(part.blob) for part in merged)
+
+
+def optimize_images(index: "ImageIndex", categories: Iterable[str]) -> Tuple[int, int]:
+    """
+    预先优化各分类中的所有图片，内容相同的图片只处理一次。
+
+    Args:
+        index (ImageIndex): 图片元数据索引
+        categories (Iterable[str]): 图片分类
+
+    Returns:
+        Tuple[int, int]: 处理的图片数与节省的字节数
+    """
+
+    done = set()
+    saved = 0
+    for category in categories:
+        for name, entry in index.refresh(category).items():
+            if entry["sha1"] not in done:
+                done.add(entry["sha1"])
+                saved += optimize_image(index.root / category / name, entry["sha1"])
+    return len(done), saved
+
+
+class ImageIndex:
+    """
+    图片元数据索引，记录各分类图片的尺寸、放置位置与SHA1哈希值。
+    按文件修改时间与大小增量更新。
+    """
+
+    def __init__(
+        self, root: Path = IMAGE_DIR, path: Path = CACHE_DIR / "image_index.json"
+    ) -> None:
+        self.root = root
+        self.path = path
+        self._index: Dict[str, Dict[str, Dict[str, Any]]] = load_json(path, {})
+        self._changed = False
+
+    def refresh(self, category: str) -> Dict[str, Dict[str, Any]]:
+        """
+        更新某一分类的索引，仅重新读取新增或有变化的图片。
+
+        Args:
+            category (str): 分类名称
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 该分类的索引
+        """
+
+        old = self._index.get(category, {})
+        new = {}
+        folder = self.root / category
+        for img_path in folder.glob("*.png") if folder.is_dir() else ():
+            stat = img_path.stat()
+            entry = old.get(img_path.name)
+            if (
+                entry is None
+                or entry["mtime"] != stat.st_mtime_ns
+                or entry["size"] != stat.st_size
+            ):
+                entry = self._read(img_path)
+                self._changed = True
+            new[img_path.name] = entry
+        if new.keys() != old.keys():
+            self._changed = True
+        self._index[category] = new
+        return new
+
+    @staticmethod
+    def _read(img_path: Path) -> Dict[str, Any]:
+        """
+        读取单张图片的元数据。
+
+        Args:
+            img_path (Path): 图片路径
+
+        Returns:
+            Dict[str, Any]: 图片元数据
+        """
+
+        blob = img_path.read_bytes()
+        with Image.open(img_path) as img:
+            img_width, img_height = img.size
+        stat = img_path.stat()
+        return {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "width": img_width,
+            "height": img_height,
+            "box": placement_box(img_width, img_height),
+            "sha1": hashlib.sha1(blob).hexdigest(),
+        }
+
+    def get(self, category: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        获取图片元数据，需先调用 refresh。
+
+        Args:
+            category (str): 分类名称
+            name (str): 图片文件名
+
+        Returns:
+            Optional[Dict[str, Any]]: 图片元数据，若图片不存在则返回None
+        """
+
+        return self._index.get(category, {}).get(name)
+
+    def save(self) -> None:
+        """如有变化，保存索引。"""
+        if not self._changed:
+            return
+        save_json(self._index, self.path)
+        self._changed = False
+
+
+class ImagePlacer:
+    """向同一演示文稿添加图片，相同内容的图片只读取一次、只保存一份。"""
+
+    def __init__(self, prs: Presentation, optimize: bool = False) -> None:
+        self._package = prs.part.package
+        self._optimize = optimize
+        # 添加的图片数与因共用部件节省的字节数
+        self.placed = 0
+        self.reused_bytes = 0
+        # 演示文稿中已有的图片也参与去重
+        self._parts: Dict[str, ImagePart] = {
+            part.sha1: part
+            for part in self._package.iter_parts()
+            if isinstance(part, ImagePart)
+        }
+        # 预先确定可用的图片部件序号，避免每添加一张图片都遍历整个包
+        self._next_idx = 1 + max(
+            (
+                part.partname.idx or 0
+                for part in self._package.iter_parts()
+                if part.partname.startswith("/ppt/media/image")
+            ),
+            default=0,
+        )
+
+    def add(self, slide: Slide, img_path: Path, sha1: str, box: Box) -> None:
+        """
+        在幻灯片中添加图片。
+
+        Args:
+            slide (Slide): 幻灯片
+            img_path (Path): 图片路径
+            sha1 (str): 图片的SHA1哈希值
+            box (Box): 左边距、上边距、宽度与高度，EMU
+        """
+
+        image_part = self._parts.get(sha1)
+        if image_part is None:
+            blob_path = optimized_path(sha1) if self._optimize else img_path
+            if not blob_path.exists():
+                blob_path = img_path
+            image = PptxImage.from_blob(blob_path.read_bytes(), img_path.name)
+            partname = PackURI(f"/ppt/media/image{self._next_idx}.{image.ext}")
+            self._next_idx += 1
+            image_part = self._parts[sha1] = ImagePart(
+                partname, image.content_type, self._package, image.blob, image.filename
+            )
+        else:
+            self.reused_bytes += len(image_part.blob)
+        self.placed += 1
+        r_id = slide.part.relate_to(image_part, RT.IMAGE)
+        # pylint: disable-next=protected-access
+        pic = slide.shapes._add_pic_from_image_part(image_part, r_id, *box)
+        # 相同内容的图片共用部件，替换文字使用本张幻灯片的图片文件名
+        pic.nvPicPr.cNvPr.set("descr", img_path.name)
+
+    def add_indexed(
+        self,
+        slide: Slide,
+        index: ImageIndex,
+        category: str,
+        name: str,
+        box: Optional[Box] = None,
+    ) -> bool:
+        """
+        按图片元数据索引在幻灯片中添加图片，需先刷新对应分类的索引。
+
+        Args:
+            slide (Slide): 幻灯片
+            index (ImageIndex): 图片元数据索引
+            category (str): 图片分类
+            name (str): 图片文件名
+            box (Optional[Box]): 左边距、上边距、宽度与高度，EMU，默认按图片尺寸计算
+
+        Returns:
+            bool: 如果图片存在并已添加，返回 True，否则返回 False
+        """
+
+        if (entry := index.get(category, name)) is None:
+            return False
+        img_path = index.root / category / name
+        self.add(slide, img_path, entry["sha1"], entry["box"] if box is None else box)
+        return True
@@ -0,0 +1,173 @@
+# -*- encoding: utf-8 -*-
+"""记录各阶段的耗时与计数，可选使用cProfile与tracemalloc分析，结果输出为JSON报告"""
+
+import cProfile
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Set
+
+from base import PROFILE_CONFIG
+from json_backend import dump_json
+
+# 可用的分析选项：计时报告、cProfile、tracemalloc
+PROFILE_OPTIONS = ("timing", "cprofile", "tracemalloc")
+# 设置后覆盖配置文件的环境变量，值为以逗号分隔的选项，如“timing,cprofile”
+PROFILE_ENV = "MC_SLIDE_PROFILE"
+# 计时报告文件名
+REPORT_NAME = "timing.json"
+# cProfile统计文件名
+PROFILE_NAME = "profile.prof"
+# tracemalloc报告中列出的内存分配位置数量
+TOP_ALLOCATIONS = 10
+
+
+def output_path(folder: Path, name: str, suffix: str = "") -> Path:
+    """
+    获取报告文件路径，后缀添加在扩展名之前。
+
+    Args:
+        folder (Path): 报告所在文件夹
+        name (str): 文件名
+        suffix (str): 文件名后缀
+
+    Returns:
+        Path: 报告文件路径
+    """
+
+    path = Path(name)
+    return folder / f"{path.stem}{suffix}{path.suffix}"
+
+
+@lru_cache(maxsize=None)
+def enabled_options() -> FrozenSet[str]:
+    """
+    获取启用的分析选项，环境变量优先于配置文件，每个进程仅读取一次。
+
+    Returns:
+        FrozenSet[str]: 启用的分析选项
+    """
+
+    value = os.environ.get(PROFILE_ENV)
+    if value is None:
+        return frozenset(o for o in PROFILE_OPTIONS if PROFILE_CONFIG[o])
+    options = {option.strip() for option in value.split(",") if option.strip()}
+    for option in options.difference(PROFILE_OPTIONS):
+        print(f"未知的分析选项：{option}。")
+    return frozenset(options.intersection(PROFILE_OPTIONS))
+
+
+class Profiler:
+    """记录某次运行中各阶段的耗时与计数。"""
+
+    def __init__(self, name: str, options: Optional[Set[str]] = None) -> None:
+        self.name = name
+        self.options = enabled_options() if options is None else frozenset(options)
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.memory: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        记录一个阶段的墙钟时间与CPU时间，同名阶段累加。
+
+        Args:
+            name (str): 阶段名称
+        """
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0, "calls": 0})
+            stats["wall"] += time.perf_counter() - wall
+            stats["cpu"] += time.process_time() - cpu
+            stats["calls"] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """
+        累加计数。
+
+        Args:
+            name (str): 计数名称
+            n (int): 增加的数量
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def run(self, folder: Path, suffix: str = "") -> Iterator["Profiler"]:
+        """
+        记录整个运行过程，按启用的选项运行cProfile与tracemalloc，结束时在指定文件夹中输出报告。
+
+        Args:
+            folder (Path): 报告所在文件夹
+            suffix (str): 报告文件名的后缀，同一文件夹中有多份报告时使用
+
+        Yields:
+            Profiler: 自身
+        """
+
+        profile = cProfile.Profile() if "cprofile" in self.options else None
+        if "tracemalloc" in self.options:
+            tracemalloc.start()
+        if profile is not None:
+            profile.enable()
+        try:
+            with self.stage("total"):
+                yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(output_path(folder, PROFILE_NAME, suffix))
+            if tracemalloc.is_tracing():
+                self._record_memory()
+                tracemalloc.stop()
+            if "timing" in self.options:
+                dump_json(
+                    self.report(), output_path(folder, REPORT_NAME, suffix), indent=4
+                )
+
+    def _record_memory(self) -> None:
+        """
+        记录tracemalloc统计的内存占用与主要的内存分配位置。
+        """
+
+        current, peak = tracemalloc.get_traced_memory()
+        statistics = tracemalloc.take_snapshot().statistics("lineno")
+        self.memory = {
+            "current": current,
+            "peak": peak,
+            "top": [
+                {"site": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in statistics[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成报告。
+
+        Returns:
+            Dict[str, Any]: 各阶段耗时（秒）、计数与内存占用（字节）
+        """
+
+        report: Dict[str, Any] = {
+            "name": self.name,
+            "stages": {
+                name: {
+                    "wall": round(stats["wall"], 6),
+                    "cpu": round(stats["cpu"], 6),
+                    "calls": stats["calls"],
+                }
+                for name, stats in self.stages.items()
+            },
+            "counters": self.counters,
+        }
+        if self.memory:
+            report["memory"] = self.memory
+        return report
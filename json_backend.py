@@ -0,0 +1,172 @@
+# -*- encoding: utf-8 -*-
+"""JSON读写后端，读取时优先使用已安装的第三方库，写入始终使用标准库以保证输出一致"""
+
+import codecs
+import importlib
+import json
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+# 可用的解析库，按优先顺序排列
+BACKEND_NAMES: Tuple[str, ...] = ("orjson", "msgspec", "ujson", "json")
+
+
+def backend_loader(name: str) -> Callable[[bytes], Any]:
+    """
+    获取解析库的解析函数。
+
+    Args:
+        name (str): 解析库名称
+
+    Returns:
+        Callable[[bytes], Any]: 解析函数
+
+    Raises:
+        ImportError: 解析库未安装
+    """
+
+    if name == "json":
+        return json.loads
+    if name not in BACKEND_NAMES:
+        raise ImportError(f"不支持的JSON解析库：{name}")
+    if name == "msgspec":
+        msgspec = importlib.import_module("msgspec")
+
+        def decode(data: bytes) -> Any:
+            # 与其他解析库一致，解析失败时抛出ValueError
+            try:
+                return msgspec.json.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+
+        return decode
+    return importlib.import_module(name).loads
+
+
+def available_backends() -> List[str]:
+    """
+    获取已安装的解析库。
+
+    Returns:
+        List[str]: 解析库名称
+    """
+
+    names = []
+    for name in BACKEND_NAMES:
+        try:
+            backend_loader(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+class JsonBackend:
+    """JSON读写后端。"""
+
+    def __init__(self, name: str = "auto") -> None:
+        self.name = "json"
+        self._loads: Callable[[bytes], Any] = json.loads
+        self.use(name)
+
+    def use(self, name: str) -> None:
+        """
+        切换解析库，指定的解析库不可用时改用标准库。
+
+        Args:
+            name (str): 解析库名称，为“auto”时使用已安装的最快的解析库
+        """
+
+        for candidate in BACKEND_NAMES if name == "auto" else (name, "json"):
+            try:
+                self._loads = backend_loader(candidate)
+            except ImportError:
+                if name != "auto":
+                    print(f"无法使用JSON解析库{name}，改用标准库。")
+                continue
+            self.name = candidate
+            return
+
+    def loads(self, data: bytes) -> Any:
+        """
+        解析JSON数据。
+
+        Args:
+            data (bytes): UTF-8编码的JSON数据，可带有BOM
+
+        Returns:
+            Any: 解析结果
+        """
+
+        return self._loads(data.removeprefix(codecs.BOM_UTF8))
+
+    def load(self, path: Path) -> Any:
+        """
+        读取JSON文件。
+
+        Args:
+            path (Path): 文件路径
+
+        Returns:
+            Any: 解析结果
+        """
+
+        return self.loads(path.read_bytes())
+
+
+def dump_json(
+    obj: Any,
+    path: Path,
+    indent: Optional[int] = None,
+    separators: Optional[Tuple[str, str]] = None,
+) -> None:
+    """
+    写入JSON文件，使用标准库，不转义非ASCII字符。
+
+    Args:
+        obj (Any): 数据
+        path (Path): 文件路径
+        indent (Optional[int]): 缩进空格数
+        separators (Optional[Tuple[str, str]]): 项与键值之间的分隔符
+    """
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=indent, separators=separators)
+
+
+def load_json(path: Path, default: Any = None) -> Any:
+    """
+    使用默认后端读取JSON文件，用于缓存与清单等可重新生成的文件。
+
+    Args:
+        path (Path): 文件路径
+        default (Any): 文件不存在或无法解析时的返回值
+
+    Returns:
+        Any: 解析结果
+    """
+
+    try:
+        return backend.load(path)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(obj: Any, path: Path, indent: Optional[int] = None) -> None:
+    """
+    原子地写入JSON文件，先写入临时文件再替换，中断时不会留下不完整的文件。
+
+    Args:
+        obj (Any): 数据
+        path (Path): 文件路径
+        indent (Optional[int]): 缩进空格数
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    dump_json(obj, tmp_path, indent)
+    tmp_path.replace(path)
+
+
+# 默认使用的后端
+backend = JsonBackend()
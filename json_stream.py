@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+"""流式读取语言文件，内存占用仅与读取块大小及最长的字符串有关"""
+
+import re
+from json import JSONDecodeError
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Iterator, Tuple
+
+# 每次读取的字符数
+CHUNK_SIZE = 1 << 16
+# 空白字符
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Reader:
+    """带缓冲区的字符读取器，已解析的部分会被丢弃。"""
+
+    def __init__(self, path: Path, chunk_size: int) -> None:
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, "r", encoding="utf-8-sig")
+        self._chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def close(self) -> None:
+        """关闭文件。"""
+        self._file.close()
+
+    def fill(self) -> bool:
+        """
+        丢弃已解析的部分并继续读取。
+
+        Returns:
+            bool: 如果读取到了新的内容，返回 True，否则返回 False
+        """
+
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        跳过空白字符，返回下一个字符，文件结束时返回空字符串。
+
+        Returns:
+            str: 下一个字符
+        """
+
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """
+        读取指定的字符。
+
+        Args:
+            char (str): 预期的字符
+        """
+
+        if self.peek() != char:
+            raise JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def string(self) -> str:
+        """
+        读取一个字符串。
+
+        Returns:
+            str: 字符串
+        """
+
+        self.expect('"')
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos)
+            except JSONDecodeError:
+                # 字符串可能被读取块截断，读取更多内容后重试
+                if not self.fill():
+                    raise
+                continue
+            self.pos = end
+            return value
+
+
+def iter_language_file(
+    path: Path, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, str]]:
+    """
+    按文件中的顺序逐条读取语言文件中的键名与字符串。
+    语言文件应为仅含字符串值的单层JSON对象。
+
+    Args:
+        path (Path): 语言文件路径
+        chunk_size (int): 每次读取的字符数
+
+    Yields:
+        Tuple[str, str]: 键名与字符串
+    """
+
+    reader = _Reader(path, chunk_size)
+    try:
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key = reader.string()
+            reader.expect(":")
+            yield key, reader.string()
+            if reader.peek() == "}":
+                return
+            reader.expect(",")
+    finally:
+        reader.close()
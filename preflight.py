@@ -0,0 +1,134 @@
+# -*- encoding: utf-8 -*-
+"""
+预检构建计划，无需打开任何幻灯片，一次遍历语言数据并列出各图片文件夹，
+统计各分类的幻灯片数量、缺少的图片、无法找到的进度边框与图标以及各语言缺少的字符串。
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Optional, Set
+
+from base import (
+    CATEGORIES,
+    IGNORE_CATEGORIES,
+    PPT_DIR,
+    lang_list,
+    language_digest,
+    sort_categories,
+)
+from advancement_icon import AdvancementIcons
+from build_plan import (
+    PLAN_PATH,
+    inputs_digest,
+    list_images,
+    listing_digest,
+    save_plan,
+)
+from slide import (
+    NO_IMAGE_CATEGORIES,
+    image_categories,
+    prepare_icon_names,
+    prepare_language_data,
+    split_shards,
+)
+from string_table import TableView
+
+
+def plan_category(
+    slide_data: TableView,
+    category: str,
+    images: Dict[str, Set[str]],
+    icons: Optional[AdvancementIcons],
+) -> Dict[str, Any]:
+    """
+    计算某一分类的构建计划。
+
+    Args:
+        slide_data (TableView): 幻灯片数据
+        category (str): 分类名称
+        images (Dict[str, Set[str]]): 各图片分类的图片文件名
+        icons (Optional[AdvancementIcons]): 按文件列表解析的进度边框与图标，忽略进度分类时为None
+
+    Returns:
+        Dict[str, Any]: 幻灯片与分片数量、模板是否存在、各键名缺少的图片与各语言缺少字符串的键名
+    """
+
+    en_us = slide_data["en_us"]
+    entry: Dict[str, Any] = {
+        "slides": len(en_us),
+        "shards": len(split_shards(slide_data)),
+        "template": (PPT_DIR / category / "template.pptx").exists(),
+    }
+    if category == "advancements":
+        entry["missing_images"] = {
+            key: icons.missing[key] for key, _ in en_us if key in icons.missing
+        }
+        entry["problems"] = icons.problems(key for key, _ in en_us)
+    elif category in NO_IMAGE_CATEGORIES:
+        entry["missing_images"] = {}
+    else:
+        names = images[category]
+        entry["missing_images"] = {
+            key: [f"{category}/{value}.png"]
+            for key, value in en_us
+            if f"{value}.png" not in names
+        }
+    entry["missing_strings"] = {}
+    for lang in lang_list:
+        if keys := [key for key, value in slide_data[lang] if not value]:
+            entry["missing_strings"][lang] = keys
+    return entry
+
+
+def main() -> None:
+    """
+    主函数，计算并输出构建计划。
+    """
+
+    parser = argparse.ArgumentParser(
+        description="预检构建计划，统计幻灯片数量与缺少的图片和字符串"
+    )
+    parser.parse_args()
+
+    start = time.perf_counter()
+    categories = [c for c in CATEGORIES if not IGNORE_CATEGORIES[c]]
+    # 语言文件只计算一次哈希值，同时用作语言数据缓存的键与构建计划的依据
+    digest = language_digest()
+    views = sort_categories(prepare_language_data(digest=digest), categories)
+    folders = image_categories(categories)
+    images = list_images(folders)
+    icons = None
+    if "advancements" in categories:
+        icons = AdvancementIcons(
+            exists=lambda c, n: n in images.get(c, ()),
+            names=prepare_icon_names(digest),
+        )
+    plan = {
+        "inputs": inputs_digest(digest),
+        "images": {folder: listing_digest(images[folder]) for folder in folders},
+        "categories": {
+            category: plan_category(view, category, images, icons)
+            for category, view in views.items()
+        },
+    }
+    save_plan(plan)
+
+    for category, entry in plan["categories"].items():
+        missing = "，".join(
+            f"{lang}{len(keys)}条" for lang, keys in entry["missing_strings"].items()
+        )
+        print(
+            f"{category}：{entry['slides']}张幻灯片"
+            + (f"，{entry['shards']}个分片" if entry["shards"] > 1 else "")
+            + ("" if entry["template"] else "，不存在模板幻灯片")
+            + f"，{len(entry['missing_images'])}项缺少图片"
+            + f"，缺少字符串：{missing or '无'}。"
+        )
+    print(
+        f"已输出构建计划至“{PLAN_PATH.name}”，"
+        f"用时{time.perf_counter() - start:.2f}秒。"
+    )
+
+
+if __name__ == "__main__":
+    main()
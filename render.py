@@ -0,0 +1,681 @@
+# -*- encoding: utf-8 -*-
+"""不依赖PowerPoint，使用Pillow按模板布局将各分类的幻灯片渲染为逐帧PNG图片"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from PIL import Image, ImageDraw, ImageFont
+from pptx import Presentation as prstt
+from pptx.enum.dml import MSO_COLOR_TYPE
+from pptx.shapes.graphfrm import GraphicFrame
+from pptx.text.text import TextFrame
+
+from base import (
+    P,
+    CATEGORIES,
+    FRAME_DIR,
+    IGNORE_CATEGORIES,
+    RENDER_CONFIG,
+    SLIDE_CONFIG,
+    language_digest,
+    sort_categories,
+)
+from advancement_icon import AdvancementIcons
+from image_index import Box, ImageIndex
+from instrumentation import Profiler
+from json_backend import load_json, save_json
+from slide import (
+    TABLE_LANGUAGES,
+    CategoryBuilder,
+    SlideTemplate,
+    category_template,
+    check_advancement_assets,
+    load_advancement_icons,
+    prepare_language_data,
+)
+from slide_manifest import build_fingerprint
+from string_table import TableView
+
+# 渲染方式版本，绘制方式变化时递增，使已渲染的帧失效
+RENDER_VERSION = 1
+# 帧清单文件名，记录各帧的指纹
+FRAME_MANIFEST = "frames.json"
+# 文本框的默认内边距（EMU），左右0.1英寸，上下0.05英寸
+INSET_X = 91440
+INSET_Y = 45720
+# 每磅对应的EMU
+EMU_PER_PT = 12700
+# 行高与字体大小之比
+LINE_SPACING = 1.2
+# 段落：文本、字体大小（磅）、颜色与是否加粗
+Paragraph = Tuple[str, float, str, bool]
+# 单帧的渲染任务：输出路径、各样式的文本与图片的路径和位置大小
+FrameJob = Tuple[str, Dict[str, str], List[Tuple[str, Box]]]
+
+# 各进程中的渲染器，由进程池初始化
+_WORKER: Dict[str, "FrameRenderer"] = {}
+
+
+def frame_path(folder: Path, n: int) -> Path:
+    """
+    获取帧文件路径，文件名为从1开始的五位幻灯片序号。
+
+    Args:
+        folder (Path): 帧文件夹
+        n (int): 幻灯片序号，从0开始
+
+    Returns:
+        Path: 帧文件路径
+    """
+
+    return folder / f"{n + 1:05d}.png"
+
+
+def font_path(style: str) -> Optional[Path]:
+    """
+    获取配置中某一样式的字体文件。
+
+    Args:
+        style (str): 样式名称
+
+    Returns:
+        Optional[Path]: 字体文件路径，未指定或不存在时为None
+    """
+
+    name = RENDER_CONFIG["font_file"].get(style, "")
+    if not name or not (path := P / name).is_file():
+        return None
+    return path
+
+
+def paragraphs_of(tf: TextFrame) -> List[Paragraph]:
+    """
+    读取模板中固定文本框的各段落，格式取自段落中的第一段文本。
+
+    Args:
+        tf (TextFrame): 文本框
+
+    Returns:
+        List[Paragraph]: 各段落
+    """
+
+    result = []
+    for paragraph in tf.paragraphs:
+        runs = paragraph.runs
+        font = runs[0].font if runs else paragraph.font
+        color = RENDER_CONFIG["foreground"]
+        if font.color.type == MSO_COLOR_TYPE.RGB:
+            color = f"#{font.color.rgb}"
+        result.append(
+            (
+                "".join(run.text for run in runs),
+                font.size.pt if font.size else 18,
+                color,
+                bool(font.bold),
+            )
+        )
+    return result
+
+
+def read_table(frame: GraphicFrame, layout: Dict[str, Any]) -> None:
+    """
+    读取译名表格中各单元格的位置大小与固定文本。
+
+    Args:
+        frame (GraphicFrame): 表格所在的形状
+        layout (Dict[str, Any]): 模板幻灯片的布局，结果写入其中
+    """
+
+    table = frame.table
+    top = int(frame.top)
+    for r, row in enumerate(table.rows):
+        left = int(frame.left)
+        for c, column in enumerate(table.columns):
+            box = (left, top, int(column.width), int(row.height))
+            layout["grid"].append(box)
+            if c == 1 and 1 <= r <= len(TABLE_LANGUAGES):
+                layout["boxes"][TABLE_LANGUAGES[r - 1]] = box
+            else:
+                layout["static"].append(
+                    (box, paragraphs_of(table.cell(r, c).text_frame))
+                )
+            left += int(column.width)
+        top += int(row.height)
+
+
+def read_layout(template_path: Path) -> Dict[str, Any]:
+    """
+    读取模板幻灯片的布局：需要填充的文本框与表格单元格的位置大小、表格中的固定文本与表格线。
+
+    Args:
+        template_path (Path): 模板路径
+
+    Returns:
+        Dict[str, Any]: 幻灯片大小、各样式文本框、固定文本与表格单元格，位置大小均为EMU
+    """
+
+    prs = prstt(template_path)
+    slide = prs.slides[0]
+    template = SlideTemplate(slide)
+    shapes = list(slide.shapes)
+    layout: Dict[str, Any] = {
+        "size": (int(prs.slide_width), int(prs.slide_height)),
+        "boxes": {},
+        "static": [],
+        "grid": [],
+    }
+    for style, i in (("source", template.source), ("key", template.key)):
+        if i is not None:
+            shape = shapes[i]
+            layout["boxes"][style] = (
+                int(shape.left),
+                int(shape.top),
+                int(shape.width),
+                int(shape.height),
+            )
+    if template.table is not None:
+        read_table(shapes[template.table], layout)
+    return layout
+
+
+def wrap_text(
+    text: str,
+    font: Union[ImageFont.ImageFont, ImageFont.FreeTypeFont],
+    max_width: float,
+) -> List[str]:
+    """
+    按宽度逐字换行，兼顾无空格的中文文本。
+
+    Args:
+        text (str): 单段文本
+        font (Union[ImageFont.ImageFont, ImageFont.FreeTypeFont]): 字体
+        max_width (float): 最大宽度，像素
+
+    Returns:
+        List[str]: 各行文本
+    """
+
+    lines = []
+    line = ""
+    for char in text:
+        if line and font.getlength(line + char) > max_width:
+            lines.append(line)
+            line = char
+        else:
+            line += char
+    lines.append(line)
+    return lines
+
+
+class FrameRenderer:
+    """按模板布局绘制帧，背景、表格线与固定文本只绘制一次，字体只加载一次。"""
+
+    def __init__(self, layout: Dict[str, Any]) -> None:
+        self.layout = layout
+        self.scale = RENDER_CONFIG["width"] / layout["size"][0]
+        self.size = (
+            RENDER_CONFIG["width"],
+            round(layout["size"][1] * self.scale),
+        )
+        self._fonts: Dict[Tuple[str, int], Any] = {}
+        self.base = self._draw_static()
+
+    def px(self, box: Box) -> Tuple[int, int, int, int]:
+        """
+        将位置大小由EMU换算为像素。
+
+        Args:
+            box (Box): 左边距、上边距、宽度与高度，EMU
+
+        Returns:
+            Tuple[int, int, int, int]: 左边距、上边距、宽度与高度，像素
+        """
+
+        left, top, width, height = box
+        return (
+            round(left * self.scale),
+            round(top * self.scale),
+            round(width * self.scale),
+            round(height * self.scale),
+        )
+
+    def font(self, style: str, size_pt: float) -> Any:
+        """
+        获取某一样式指定大小的字体，未指定字体文件时使用Pillow的默认字体。
+
+        Args:
+            style (str): 样式名称
+            size_pt (float): 字体大小，磅
+
+        Returns:
+            Any: 字体
+        """
+
+        size = max(1, round(size_pt * EMU_PER_PT * self.scale))
+        if (style, size) not in self._fonts:
+            path = font_path(style)
+            self._fonts[style, size] = (
+                ImageFont.load_default(size)
+                if path is None
+                else ImageFont.truetype(str(path), size)
+            )
+        return self._fonts[style, size]
+
+    def _lines(
+        self, style: str, paragraphs: List[Paragraph], max_width: Optional[float]
+    ) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        """
+        将各段落拆分为行，并确定每行的字体、颜色与模拟粗体的描边。
+
+        Args:
+            style (str): 字体所用的样式名称
+            paragraphs (List[Paragraph]): 各段落
+            max_width (Optional[float]): 换行宽度，像素，为None时不换行
+
+        Returns:
+            List[Tuple[str, Any, Dict[str, Any]]]: 各行的文本、字体与绘制参数
+        """
+
+        lines = []
+        for text, size_pt, color, bold in paragraphs:
+            font = self.font(style, size_pt)
+            options = {
+                "fill": color,
+                "stroke_width": round(font.size / 40) if bold else 0,
+                "stroke_fill": color,
+            }
+            for line in (
+                [text] if max_width is None else wrap_text(text, font, max_width)
+            ):
+                lines.append((line, font, options))
+        return lines
+
+    def draw_text(
+        self,
+        draw: ImageDraw.ImageDraw,
+        box: Box,
+        style: str,
+        paragraphs: List[Paragraph],
+        middle: bool,
+    ) -> None:
+        """
+        在文本框中居中绘制各段落。
+
+        Args:
+            draw (ImageDraw.ImageDraw): 绘图对象
+            box (Box): 文本框位置大小，EMU
+            style (str): 字体所用的样式名称
+            paragraphs (List[Paragraph]): 各段落
+            middle (bool): 是否垂直居中，否则顶端对齐；为True时同时按文本框宽度换行
+        """
+
+        left, top, width, height = self.px(box)
+        lines = self._lines(
+            style, paragraphs, width - 2 * INSET_X * self.scale if middle else None
+        )
+        y = top + INSET_Y * self.scale
+        if middle:
+            y += (
+                height
+                - 2 * INSET_Y * self.scale
+                - sum(font.size * LINE_SPACING for _, font, _ in lines)
+            ) / 2
+        for line, font, options in lines:
+            draw.text(
+                (left + width / 2, y + font.size * LINE_SPACING / 2),
+                line,
+                font=font,
+                anchor="mm",
+                **options,
+            )
+            y += font.size * LINE_SPACING
+
+    def _draw_static(self) -> Image.Image:
+        """
+        绘制背景、表格线与表格中的固定文本。
+
+        Returns:
+            Image.Image: 各帧共用的底图
+        """
+
+        image = Image.new("RGB", self.size, RENDER_CONFIG["background"])
+        draw = ImageDraw.Draw(image)
+        line_width = max(1, round(EMU_PER_PT * self.scale))
+        for box in self.layout["grid"]:
+            left, top, width, height = self.px(box)
+            draw.rectangle(
+                (left, top, left + width, top + height),
+                outline=RENDER_CONFIG["line"],
+                width=line_width,
+            )
+        for box, paragraphs in self.layout["static"]:
+            self.draw_text(draw, box, "label", paragraphs, True)
+        return image
+
+    def render(
+        self, strings: Dict[str, str], images: List[Tuple[str, Box]]
+    ) -> Image.Image:
+        """
+        绘制单帧。
+
+        Args:
+            strings (Dict[str, str]): 各样式的文本
+            images (List[Tuple[str, Box]]): 图片路径与位置大小
+
+        Returns:
+            Image.Image: 帧图片
+        """
+
+        frame = self.base.copy()
+        draw = ImageDraw.Draw(frame)
+        for style, box in self.layout["boxes"].items():
+            paragraphs = [
+                (
+                    text,
+                    SLIDE_CONFIG["size"][style],
+                    RENDER_CONFIG["foreground"],
+                    SLIDE_CONFIG["bold"][style],
+                )
+                for text in strings[style].replace("\v", "\n").split("\n")
+            ]
+            self.draw_text(draw, box, style, paragraphs, style in TABLE_LANGUAGES)
+        for img_path, box in images:
+            left, top, width, height = self.px(box)
+            with Image.open(img_path) as img:
+                img = img.convert("RGBA").resize(
+                    (max(1, width), max(1, height)), Image.Resampling.LANCZOS
+                )
+            frame.paste(img, (left, top), img)
+        return frame
+
+
+def init_worker(layout: Dict[str, Any]) -> None:
+    """
+    初始化渲染进程，每个进程只绘制一次底图。
+
+    Args:
+        layout (Dict[str, Any]): 模板幻灯片的布局
+    """
+
+    _WORKER["renderer"] = FrameRenderer(layout)
+
+
+def render_frame(job: FrameJob) -> None:
+    """
+    在渲染进程中绘制并保存单帧。
+
+    Args:
+        job (FrameJob): 渲染任务
+    """
+
+    path, strings, images = job
+    _WORKER["renderer"].render(strings, images).save(path)
+
+
+def render_fingerprint(template_path: Path) -> str:
+    """
+    计算整个分类共用的渲染输入的指纹，包括模板幻灯片、幻灯片样式、渲染配置与字体文件。
+
+    Args:
+        template_path (Path): 模板路径
+
+    Returns:
+        str: 指纹
+    """
+
+    h = hashlib.sha1(str(RENDER_VERSION).encode())
+    h.update(build_fingerprint(template_path).encode())
+    h.update(json.dumps(RENDER_CONFIG, sort_keys=True).encode("utf-8"))
+    for style in RENDER_CONFIG["font_file"]:
+        if (path := font_path(style)) is not None:
+            stat = path.stat()
+            h.update(f"{style}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return h.hexdigest()
+
+
+def sync_frames(
+    folder: Path, old: List[Optional[str]], new: List[str]
+) -> Dict[int, str]:
+    """
+    按指纹沿用已渲染的帧，幻灯片顺序变化时重新编号，并删除多余的帧。
+
+    Args:
+        folder (Path): 帧文件夹
+        old (List[Optional[str]]): 已渲染的各帧的指纹，未完成渲染的帧为None
+        new (List[str]): 需要的各帧的指纹
+
+    Returns:
+        Dict[int, str]: 沿用的帧的序号与指纹
+    """
+
+    reusable: Dict[str, Path] = {}
+    for n, fingerprint in enumerate(old):
+        path = frame_path(folder, n)
+        if fingerprint is not None and fingerprint not in reusable and path.exists():
+            reusable[fingerprint] = path
+    # 先移至临时文件名，避免重新编号时覆盖尚未移动的帧
+    staged: Dict[int, Path] = {}
+    for n, fingerprint in enumerate(new):
+        if (path := reusable.pop(fingerprint, None)) is not None:
+            staged[n] = path.rename(folder / f"{n + 1:05d}.tmp")
+    for path in folder.glob("*.png"):
+        path.unlink()
+    for n, path in staged.items():
+        path.rename(frame_path(folder, n))
+    return {n: new[n] for n in staged}
+
+
+def load_frame_manifest(folder: Path, build: str) -> List[Optional[str]]:
+    """
+    读取帧清单。
+
+    Args:
+        folder (Path): 帧文件夹
+        build (str): 分类共用渲染输入的指纹
+
+    Returns:
+        List[Optional[str]]: 已渲染的各帧的指纹，清单不存在或共用输入有变化时为空
+    """
+
+    manifest = load_json(folder / FRAME_MANIFEST, {})
+    return manifest.get("frames", []) if manifest.get("build") == build else []
+
+
+def save_frame_manifest(folder: Path, build: str, frames: List[Optional[str]]) -> None:
+    """
+    保存帧清单。
+
+    Args:
+        folder (Path): 帧文件夹
+        build (str): 分类共用渲染输入的指纹
+        frames (List[Optional[str]]): 各帧的指纹，尚未渲染的帧为None
+    """
+
+    save_json({"build": build, "frames": frames}, folder / FRAME_MANIFEST)
+
+
+def frame_job(
+    builder: CategoryBuilder, folder: Path, n: int
+) -> Tuple[FrameJob, List[str]]:
+    """
+    生成单帧的渲染任务，图片位置与添加到幻灯片时相同。
+
+    Args:
+        builder (CategoryBuilder): 该分类的幻灯片生成器
+        folder (Path): 帧文件夹
+        n (int): 幻灯片序号
+
+    Returns:
+        Tuple[FrameJob, List[str]]: 渲染任务与缺失的图片
+    """
+
+    slide_data, index = builder.slide_data, builder.index
+    key, value = slide_data["en_us"][n]
+    strings = {"source": value, "key": key}
+    for lang in TABLE_LANGUAGES:
+        strings[lang] = slide_data[lang][n][1]
+    images = []
+    missing = []
+    for category, name, box in builder.images[n]:
+        if (entry := index.get(category, name)) is None:
+            missing.append(f"{category}/{name}")
+            continue
+        # 进度图标的位置为pptx长度对象，跨进程传递前转为整数
+        box = tuple(int(v) for v in (entry["box"] if box is None else box))
+        images.append((str(index.root / category / name), box))
+    return (str(frame_path(folder, n)), strings, images), missing
+
+
+def frame_jobs(
+    builder: CategoryBuilder, folder: Path, pending: List[int], profiler: Profiler
+) -> List[FrameJob]:
+    """
+    生成需要渲染的各帧的任务，并输出、记录缺失的图片。
+
+    Args:
+        builder (CategoryBuilder): 该分类的幻灯片生成器
+        folder (Path): 帧文件夹
+        pending (List[int]): 需要渲染的幻灯片序号
+        profiler (Profiler): 记录计数的分析器
+
+    Returns:
+        List[FrameJob]: 渲染任务
+    """
+
+    jobs = []
+    for n in pending:
+        job, missing = frame_job(builder, folder, n)
+        jobs.append(job)
+        for name in missing:
+            print(f"无法找到图片：{name}。")
+        profiler.count("missing_images", len(missing))
+    return jobs
+
+
+def render_frames(layout: Dict[str, Any], jobs: List[FrameJob], workers: int) -> None:
+    """
+    渲染各帧，可使用多个进程并行渲染。
+
+    Args:
+        layout (Dict[str, Any]): 模板幻灯片的布局
+        jobs (List[FrameJob]): 渲染任务
+        workers (int): 渲染进程数，不大于1时在当前进程中渲染
+    """
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(layout,)
+        ) as executor:
+            list(executor.map(render_frame, jobs, chunksize=8))
+    elif jobs:
+        init_worker(layout)
+        for job in jobs:
+            render_frame(job)
+
+
+def render_category(
+    slide_data: TableView,
+    category: str,
+    workers: int = 1,
+    full: bool = False,
+    icons: Optional[AdvancementIcons] = None,
+) -> None:
+    """
+    将某一分类的幻灯片渲染为逐帧PNG图片，仅重新渲染输入有变化的帧。
+
+    Args:
+        slide_data (TableView): 幻灯片数据
+        category (str): 分类名称
+        workers (int): 渲染进程数，不大于1时在当前进程中渲染
+        full (bool): 是否忽略帧清单，重新渲染所有帧
+        icons (Optional[AdvancementIcons]): 已解析的进度边框与图标，默认重新解析
+    """
+
+    if (template_path := category_template(slide_data, category)) is None:
+        return
+    count = len(slide_data["en_us"])
+
+    print(f"开始渲染帧，分类：{category}，共{count}张。")
+    folder = FRAME_DIR / category
+    folder.mkdir(parents=True, exist_ok=True)
+    with Profiler(category).run(folder) as profiler:
+        profiler.count("frames", count)
+        with profiler.stage("layout"):
+            layout = read_layout(template_path)
+            build = render_fingerprint(template_path)
+        with profiler.stage("image_index"):
+            builder = CategoryBuilder(
+                slide_data, category, ImageIndex(), profiler, icons
+            )
+            builder.index.save()
+        with profiler.stage("sync"):
+            new = [fingerprint for _, fingerprint in builder.fingerprints()]
+            kept = sync_frames(
+                folder, [] if full else load_frame_manifest(folder, build), new
+            )
+            # 渲染中断时，未完成的帧在下次运行时重新渲染
+            save_frame_manifest(folder, build, [kept.get(n) for n in range(count)])
+        jobs = frame_jobs(
+            builder, folder, [n for n in range(count) if n not in kept], profiler
+        )
+        profiler.count("rendered_frames", len(jobs))
+        with profiler.stage("render"):
+            render_frames(layout, jobs, workers)
+        save_frame_manifest(folder, build, new)
+    print(f"已渲染{len(jobs)}帧，沿用{len(kept)}帧，输出至“{folder}”。")
+
+
+def main() -> None:
+    """
+    主函数，渲染各分类的帧。
+    """
+
+    parser = argparse.ArgumentParser(description="使用Pillow将幻灯片渲染为逐帧PNG图片")
+    parser.add_argument(
+        "categories",
+        nargs="*",
+        help="需要渲染的分类，默认为配置文件中未忽略的分类",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=RENDER_CONFIG["workers"] or os.cpu_count() or 1,
+        help="渲染进程数，默认使用配置文件中的设置",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="忽略帧清单，重新渲染所有帧",
+    )
+    args = parser.parse_args()
+
+    if unknown := [c for c in args.categories if c not in CATEGORIES]:
+        parser.error(f"未知的分类：{'、'.join(unknown)}。")
+    categories = args.categories or [c for c in CATEGORIES if not IGNORE_CATEGORIES[c]]
+    missing_fonts = [
+        style for style in RENDER_CONFIG["font_file"] if font_path(style) is None
+    ]
+    if missing_fonts:
+        print(
+            f"以下样式未指定可用的字体文件，将使用Pillow的默认字体：{'、'.join(missing_fonts)}。"
+        )
+
+    digest = language_digest()
+    slide_data = sort_categories(prepare_language_data(digest=digest), categories)
+    icons = None
+    if "advancements" in slide_data:
+        icons = load_advancement_icons(digest)
+        check_advancement_assets(slide_data["advancements"], icons, digest)
+    for category, view in slide_data.items():
+        render_category(view, category, args.jobs, args.full, icons)
+    print("已完成。")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,71 @@
 # -*- encoding: utf-8 -*-
 """自动化生成Minecraft标准译名列表所用脚本，列表载体为PowerPoint幻灯片。"""
 
-import json
-import re
-from typing import Dict
+import argparse
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
-from PIL import Image
 from pptx import Presentation as prstt
-from pptx.util import Pt, Cm
-from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+from pptx.util import Pt
+from pptx.enum.text import PP_ALIGN
 from pptx.presentation import Presentation
+from pptx.slide import Slide
+from pptx.text.text import TextFrame
 
 from base import (
     LANG_DIR,
-    IMAGE_DIR,
     PPT_DIR,
     SLIDE_CONFIG,
+    CATEGORIES,
     IGNORE_CATEGORIES,
     IGNORE_SUPPLEMENTS,
-    sort_data,
+    MERGED_KEY_PATTERN,
+    NEW_STRINGS_ONLY,
+    OPTIMIZE_IMAGES,
+    SHARD_SIZE,
+    sort_categories,
     load_language_files,
+    language_digest,
+    load_cache,
+    save_cache,
     lang_list,
     lang_file_list,
     lang_list_table,
+    Ldata,
     LdataCo,
-    LdataTuple,
+    store,
 )
+from advancement_icon import (
+    IMAGE_CATEGORIES as ICON_IMAGE_CATEGORIES,
+    AdvancementIcons,
+    icon_names,
+)
+from build_plan import load_plan
+from image_index import (
+    ImageIndex,
+    ImagePlacer,
+    ImageSpec,
+    dedupe_media,
+    optimize_images,
+)
+from json_backend import backend, dump_json
+from instrumentation import Profiler
+from slide_cloner import SlideCloner
+from slide_manifest import SlideManifest, build_fingerprint, slide_fingerprint
+from string_table import StringTable, TableView
+
+# 译名表格中自第二行起各行的语言
+TABLE_LANGUAGES = ["zh_cn", "zh_hk", "zh_tw", "lzh"]
+# 不添加图片的分类
+NO_IMAGE_CATEGORIES = {"biome", "enchantment"}
+# 分片索引文件名
+SHARD_INDEX_NAME = "shards.json"
 
 
 def update_language_data(data: LdataCo, new_string: bool = False) -> LdataCo:
@@ -53,12 +93,7 @@ def update_language_data(data: LdataCo, new_string: bool = False) -> LdataCo:
                 else f"{trim_pattern_str}{smithing_template_str}"
             )
 
-        keys_to_delete = [
-            key
-            for key in data[lang]
-            if key.startswith("item.minecraft.music_disc")
-            or re.match(r"^item\.minecraft\.[^.]*_banner_pattern$", key)
-        ]
+        keys_to_delete = [key for key in data[lang] if MERGED_KEY_PATTERN.match(key)]
         for key in keys_to_delete:
             updated_data[lang].pop(key, None)
         updated_data[lang].pop("item.minecraft.smithing_template", None)
@@ -67,7 +102,9 @@ def update_language_data(data: LdataCo, new_string: bool = False) -> LdataCo:
             netherite_upgrade_str = data[lang].get(
                 "upgrade.minecraft.netherite_upgrade", ""
             )
-            banner_pattern_str = data[lang].get("item.minecraft.mojang_banner_pattern", "")
+            banner_pattern_str = data[lang].get(
+                "item.minecraft.mojang_banner_pattern", ""
+            )
             music_disc_str = data[lang].get("item.minecraft.music_disc_5", "")
             updated_data[lang]["item.minecraft.netherite_upgrade_smithing_template"] = (
                 f"{netherite_upgrade_str} {smithing_template_str}"
@@ -88,116 +125,807 @@ def load_supplements(data: LdataCo) -> None:
         data (LdataCo): 语言数据
     """
 
-    with open(LANG_DIR / "supplements.json", "r", encoding="utf-8") as f:
-        supplements = json.load(f)
+    supplements = backend.load(LANG_DIR / "supplements.json")
     for lang in lang_list_table:
         data[lang].update(supplements[lang])
     print(f"已补充{len(supplements['zh_cn'])}条字符串。")
 
 
-def edit_text(
-    slide_data: Dict[str, LdataTuple], category: str, prs: Presentation
-) -> None:
+def fill_text_frame(tf: TextFrame, text: str) -> None:
     """
-    编辑幻灯片文本。
+    替换文本框中的文本，保留模板中第一段的段落格式。
 
     Args:
-        slide_data (Dict[str, LdataTuple]): 幻灯片数据
-        category (str): 分类名称
-        prs (Presentation): 幻灯片对象
+        tf (TextFrame): 文本框
+        text (str): 文本
     """
 
-    print(f"开始编辑幻灯片文本，分类：{category}。")
-    for n, slide in enumerate(prs.slides):
-        for shape in slide.shapes:
+    first, *rest = text.split("\n")
+    paragraph = tf.paragraphs[0]
+    runs = paragraph.runs
+    if len(runs) == 1 and first and "\v" not in first:
+        runs[0].text = first
+    else:
+        paragraph.text = first
+    for line in rest:
+        tf.add_paragraph().text = line
+
+
+class SlideTemplate:  # pylint: disable=too-few-public-methods
+    """
+    模板幻灯片中需要填充的形状。
+    分析模板一次，记录源字符串、本地化键名与译名表格所在的位置，并在模板上统一设置字体，
+    复制出的幻灯片只需按位置直接替换文本。
+    """
+
+    def __init__(self, slide: Slide) -> None:
+        self.source: Optional[int] = None
+        self.key: Optional[int] = None
+        self.table: Optional[int] = None
+        for i, shape in enumerate(slide.shapes):
             if shape.has_text_frame:
-                tf = shape.text_frame
                 # 源字符串
-                if tf.text == "Source String":
-                    tf.text = slide_data["en_us"][n][1]
-                    paragraph = tf.paragraphs[0]
-                    paragraph.alignment = PP_ALIGN.CENTER
-                    paragraph.font.name = SLIDE_CONFIG["font"]["source"]
-                    paragraph.font.size = Pt(SLIDE_CONFIG["size"]["source"])
-                    paragraph.font.bold = SLIDE_CONFIG["bold"]["source"]
+                if shape.text_frame.text == "Source String":
+                    self.source = i
+                    self._format(shape.text_frame, "source")
                 # 本地化键名
-                elif tf.text == "Translation Key":
-                    tf.text = slide_data["en_us"][n][0]
-                    paragraph = tf.paragraphs[0]
-                    paragraph.alignment = PP_ALIGN.CENTER
-                    paragraph.font.name = SLIDE_CONFIG["font"]["key"]
-                    paragraph.font.size = Pt(SLIDE_CONFIG["size"]["key"])
-                    paragraph.font.bold = SLIDE_CONFIG["bold"]["key"]
-            # 编辑表格
+                elif shape.text_frame.text == "Translation Key":
+                    self.key = i
+                    self._format(shape.text_frame, "key")
+            # 译名表格
             if shape.has_table:
-                table = shape.table
-                for i, lang_name in enumerate(
-                    ["zh_cn", "zh_hk", "zh_tw", "lzh"], start=1
-                ):
-                    cell = table.cell(i, 1)
-                    cell.text = slide_data[lang_name][n][1]
-                    paragraph = cell.text_frame.paragraphs[0]
-                    paragraph.alignment = PP_ALIGN.CENTER
-                    paragraph.vertical_anchor = MSO_ANCHOR.MIDDLE
-                    paragraph.font.name = SLIDE_CONFIG["font"][lang_name]
-                    paragraph.font.size = Pt(SLIDE_CONFIG["size"][lang_name])
-                    paragraph.font.bold = SLIDE_CONFIG["bold"][lang_name]
+                self.table = i
+                for row, lang_name in enumerate(TABLE_LANGUAGES, start=1):
+                    self._format(shape.table.cell(row, 1).text_frame, lang_name)
+
+    @staticmethod
+    def _format(tf: TextFrame, style: str) -> None:
+        """
+        清空文本框，并按配置设置其段落格式。
+
+        Args:
+            tf (TextFrame): 文本框
+            style (str): 配置中的样式名称
+        """
+
+        tf.text = style
+        paragraph = tf.paragraphs[0]
+        paragraph.alignment = PP_ALIGN.CENTER
+        paragraph.font.name = SLIDE_CONFIG["font"][style]
+        paragraph.font.size = Pt(SLIDE_CONFIG["size"][style])
+        paragraph.font.bold = SLIDE_CONFIG["bold"][style]
+
+    def fill(self, slide: Slide, slide_data: TableView, n: int) -> None:
+        """
+        填充单张幻灯片文本。
+
+        Args:
+            slide (Slide): 由模板复制的幻灯片
+            slide_data (TableView): 幻灯片数据
+            n (int): 幻灯片序号
+        """
+
+        shapes = list(slide.shapes)
+        key, value = slide_data["en_us"][n]
+        if self.source is not None:
+            fill_text_frame(shapes[self.source].text_frame, value)
+        if self.key is not None:
+            fill_text_frame(shapes[self.key].text_frame, key)
+        if self.table is not None:
+            table = shapes[self.table].table
+            for row, lang_name in enumerate(TABLE_LANGUAGES, start=1):
+                fill_text_frame(
+                    table.cell(row, 1).text_frame, slide_data[lang_name][n][1]
+                )
 
 
 def add_image(
-    slide_data: Dict[str, LdataTuple], category: str, prs: Presentation
+    slide_data: TableView,
+    category: str,
+    prs: Presentation,
+    index: Optional[ImageIndex] = None,
 ) -> None:
     """
-    在幻灯片中添加图片。
+    在已生成的幻灯片中批量添加图片。
 
     Args:
-        slide_data (Dict[str, LdataTuple]): 幻灯片数据
+        slide_data (TableView): 幻灯片数据
         category (str): 分类名称
         prs (Presentation): 幻灯片对象
+        index (Optional[ImageIndex]): 图片元数据索引，默认读取缓存中的索引
     """
 
     print(f"开始添加图片，分类：{category}。")
+    if index is None:
+        index = ImageIndex()
+    index.refresh(category)
+    placer = ImagePlacer(prs)
     for n, slide in enumerate(prs.slides):
-        img_path = IMAGE_DIR / category / f"{slide_data['en_us'][n][1]}.png"
-        if img_path.exists():
-            img = Image.open(img_path)
-            img_width, img_height = img.size
-            img_width_cm = img_width / 72 * 2.54
-            img_height_cm = img_height / 72 * 2.54
-
-            if img_height_cm > 12:
-                img_width_cm *= 12 / img_height_cm
-                img_height_cm = 12
-            if img_width_cm > 8:
-                img_height_cm *= 8 / img_width_cm
-                img_width_cm = 8
-
-            slide.shapes.add_picture(
-                image_file=str(img_path),
-                left=Cm(28.57 - img_width_cm / 2),
-                top=Cm((19.05 - img_height_cm) / 2 + 0.38),
-                width=Cm(img_width_cm),
-                height=Cm(img_height_cm),
+        placer.add_indexed(slide, index, category, f"{slide_data['en_us'][n][1]}.png")
+    index.save()
+
+
+def reorder_slides(prs: Presentation, r_ids: List[str]) -> int:
+    """
+    按给定顺序重排幻灯片，并移除不在其中的幻灯片。
+
+    Args:
+        prs (Presentation): 幻灯片对象
+        r_ids (List[str]): 按新顺序排列的幻灯片关系ID
+
+    Returns:
+        int: 移除的幻灯片数量
+    """
+
+    sld_id_lst = prs.part.presentation.element.get_or_add_sldIdLst()
+    kept = set(r_ids)
+    sld_ids = {}
+    removed = 0
+    for sld_id in list(sld_id_lst.sldId_lst):
+        sld_id_lst.remove(sld_id)
+        if sld_id.rId in kept:
+            sld_ids[sld_id.rId] = sld_id
+        else:
+            prs.part.rels.pop(sld_id.rId)
+            removed += 1
+    for r_id in r_ids:
+        sld_id_lst.append(sld_ids[r_id])
+    # 访问幻灯片集合时，幻灯片部件会按新的顺序重新命名
+    _ = prs.slides
+    return removed
+
+
+class CategoryBuilder:
+    """生成某一分类的幻灯片，可完整生成，也可在已有幻灯片的基础上增量更新。"""
+
+    def __init__(
+        self,
+        slide_data: TableView,
+        category: str,
+        index: ImageIndex,
+        profiler: Optional[Profiler] = None,
+        icons: Optional[AdvancementIcons] = None,
+    ) -> None:
+        self.slide_data = slide_data
+        self.category = category
+        self.index = index
+        self.icons = icons
+        self.profiler = Profiler(category, set()) if profiler is None else profiler
+        self.template_path = PPT_DIR / category / "template.pptx"
+        self.images = self._slide_images()
+
+    def _slide_images(self) -> List[List[ImageSpec]]:
+        """
+        获取各张幻灯片需要添加的图片。
+
+        Returns:
+            List[List[ImageSpec]]: 各张幻灯片图片的分类、文件名与位置大小
+        """
+
+        en_us = self.slide_data["en_us"]
+        if self.category == "advancements":
+            if self.icons is None:
+                self.icons = AdvancementIcons(self.index, names=prepare_icon_names())
+            else:
+                # 边框与图标已解析，添加图片时仍需这些分类的索引
+                for image_category in ICON_IMAGE_CATEGORIES:
+                    self.index.refresh(image_category)
+            return [self.icons.images(key) for key, _ in en_us]
+        if self.category in NO_IMAGE_CATEGORIES:
+            return [[] for _ in en_us]
+        self.index.refresh(self.category)
+        return [
+            (
+                [(self.category, f"{value}.png", None)]
+                if self.index.get(self.category, f"{value}.png")
+                else []
+            )
+            for _, value in en_us
+        ]
+
+    def fingerprints(self) -> List[Tuple[str, str]]:
+        """
+        计算各张幻灯片的键名与输入指纹。
+
+        Returns:
+            List[Tuple[str, str]]: 各张幻灯片的键名与指纹
+        """
+
+        result = []
+        for n, (key, _) in enumerate(self.slide_data["en_us"]):
+            strings = [self.slide_data[lang][n][1] for lang in lang_list]
+            digests = [
+                [c, name, box, (self.index.get(c, name) or {}).get("sha1")]
+                for c, name, box in self.images[n]
+            ]
+            result.append((key, slide_fingerprint(key, strings, digests)))
+        return result
+
+    def _fill(
+        self, slide: Slide, n: int, template: SlideTemplate, placer: ImagePlacer
+    ) -> None:
+        """
+        填充单张幻灯片的文本并添加图片。
+
+        Args:
+            slide (Slide): 由模板复制的幻灯片
+            n (int): 幻灯片序号
+            template (SlideTemplate): 模板幻灯片中需要填充的形状
+            placer (ImagePlacer): 图片添加器
+        """
+
+        with self.profiler.stage("text"):
+            template.fill(slide, self.slide_data, n)
+        with self.profiler.stage("images"):
+            for category, name, box in self.images[n]:
+                if placer.add_indexed(slide, self.index, category, name, box):
+                    self.profiler.count("images")
+                else:
+                    print(f"无法找到图片：{category}/{name}。")
+                    self.profiler.count("missing_images")
+
+    def build(self) -> Presentation:
+        """
+        从模板开始逐张复制、填充文本并添加图片，生成整个分类的幻灯片。
+
+        Returns:
+            Presentation: 幻灯片对象
+        """
+
+        prs = prstt(self.template_path)
+        template = prs.slides[0]
+        # 先在模板上设置字体，复制出的幻灯片沿用
+        slide_template = SlideTemplate(template)
+        cloner = SlideCloner(prs, seed=self.category)
+        placer = ImagePlacer(prs, OPTIMIZE_IMAGES)
+
+        # 模板幻灯片最后填充，使复制出的幻灯片均来自未填充的模板
+        for n in [*range(1, len(self.slide_data["en_us"])), 0]:
+            with self.profiler.stage("clone"):
+                slide = cloner.clone(template) if n else template
+            self._fill(slide, n, slide_template, placer)
+            self.profiler.count("built_slides")
+        self.profiler.count("reused_image_bytes", placer.reused_bytes)
+        return prs
+
+    def _rebuild(
+        self,
+        prs: Presentation,
+        new_slides: List[Tuple[str, str]],
+        reusable: Dict[Tuple[str, str], str],
+    ) -> List[str]:
+        """
+        在演示文稿末尾生成需要重新生成的幻灯片。
+
+        Args:
+            prs (Presentation): 已有的输出幻灯片对象
+            new_slides (List[Tuple[str, str]]): 需要生成的幻灯片的键名与指纹
+            reusable (Dict[Tuple[str, str], str]): 可以沿用的幻灯片及其关系ID
+
+        Returns:
+            List[str]: 按新顺序排列的幻灯片关系ID
+        """
+
+        # 从模板文件复制，版式等部件使用输出幻灯片中的同名部件
+        template = prstt(self.template_path).slides[0]
+        slide_template = SlideTemplate(template)
+        parts = {part.partname: part for part in prs.part.package.iter_parts()}
+        cloner = SlideCloner(prs)
+        placer = ImagePlacer(prs, OPTIMIZE_IMAGES)
+        order: List[Union[str, Part]] = []
+        for n, item in enumerate(new_slides):
+            if item in reusable:
+                order.append(reusable[item])
+            else:
+                with self.profiler.stage("clone"):
+                    slide = cloner.clone(template, parts)
+                self._fill(slide, n, slide_template, placer)
+                self.profiler.count("built_slides")
+                order.append(slide.part)
+        self.profiler.count("reused_image_bytes", placer.reused_bytes)
+
+        r_ids = {
+            rel.target_part: r_id
+            for r_id, rel in prs.part.rels.items()
+            if rel.reltype == RT.SLIDE
+        }
+        return [r_ids.get(item, item) for item in order]
+
+    def patch(
+        self,
+        output_path: Path,
+        old_slides: List[Tuple[str, str]],
+        new_slides: List[Tuple[str, str]],
+    ) -> Optional[Presentation]:
+        """
+        在已有的输出幻灯片中，仅重新生成输入有变化的幻灯片，插入新增的幻灯片并移除多余的幻灯片。
+
+        Args:
+            output_path (Path): 已有的输出幻灯片路径
+            old_slides (List[Tuple[str, str]]): 已有幻灯片的键名与指纹
+            new_slides (List[Tuple[str, str]]): 需要生成的幻灯片的键名与指纹
+
+        Returns:
+            Optional[Presentation]: 修改后的幻灯片对象，若已有幻灯片与构建清单不一致则返回None
+        """
+
+        prs = prstt(output_path)
+        sld_ids = prs.part.presentation.element.get_or_add_sldIdLst().sldId_lst
+        if len(sld_ids) != len(old_slides):
+            print("输出幻灯片与构建清单不一致。")
+            return None
+        wanted = set(new_slides)
+        reusable = {
+            item: sld_id.rId
+            for item, sld_id in zip(old_slides, sld_ids)
+            if item in wanted
+        }
+
+        r_ids = self._rebuild(prs, new_slides, reusable)
+        removed = reorder_slides(prs, r_ids)
+        rebuilt = len(r_ids) - sum(1 for item in new_slides if item in reusable)
+        print(f"增量更新：重新生成{rebuilt}张幻灯片，移除{removed}张旧幻灯片。")
+        return prs
+
+
+def category_template(slide_data: TableView, category: str) -> Optional[Path]:
+    """
+    获取分类的模板幻灯片路径，并检查该分类是否有需要生成的幻灯片。
+
+    Args:
+        slide_data (TableView): 幻灯片数据
+        category (str): 分类名称
+
+    Returns:
+        Optional[Path]: 模板路径，若模板不存在或没有字符串则返回None
+    """
+
+    template_path = PPT_DIR / category / "template.pptx"
+    if not template_path.exists():
+        print(f"分类{category}不存在模板幻灯片。")
+        return None
+    if len(slide_data["en_us"]) == 0:
+        print(f"不存在分类为{category}的字符串。")
+        return None
+    return template_path
+
+
+def shard_suffix(shard: Optional[int]) -> str:
+    """
+    获取分片的文件名后缀。
+
+    Args:
+        shard (Optional[int]): 分片序号，从0开始，不分片时为None
+
+    Returns:
+        str: 后缀，如“_001”，不分片时为空字符串
+    """
+
+    return "" if shard is None else f"_{shard + 1:03d}"
+
+
+def shard_label(category: str, shard: Optional[int]) -> str:
+    """
+    获取输出信息中分类或分片的名称。
+
+    Args:
+        category (str): 分类名称
+        shard (Optional[int]): 分片序号，从0开始，不分片时为None
+
+    Returns:
+        str: 名称，如“item（分片1）”
+    """
+
+    return category if shard is None else f"{category}（分片{shard + 1}）"
+
+
+def split_shards(
+    slide_data: TableView, shard_size: int = SHARD_SIZE
+) -> List[Tuple[Optional[int], TableView]]:
+    """
+    按分片大小将某一分类的幻灯片数据切分为连续的分片，各分片保持排序后的顺序。
+
+    Args:
+        slide_data (TableView): 幻灯片数据
+        shard_size (int): 每个分片的幻灯片数，不大于0时不分片
+
+    Returns:
+        List[Tuple[Optional[int], TableView]]: 各分片的序号与幻灯片数据，不分片时只有一个序号为None的分片
+    """
+
+    count = len(slide_data["en_us"])
+    if shard_size <= 0 or count <= shard_size:
+        return [(None, slide_data)]
+    return [
+        (n, TableView(slide_data.table, slide_data.rows[start : start + shard_size]))
+        for n, start in enumerate(range(0, count, shard_size))
+    ]
+
+
+def write_shard_index(
+    category: str, shards: List[Tuple[Optional[int], TableView]]
+) -> None:
+    """
+    输出分类的分片索引，记录各分片的文件名、幻灯片数与首尾的键名和源字符串，并移除多余的输出幻灯片。
+
+    Args:
+        category (str): 分类名称
+        shards (List[Tuple[Optional[int], TableView]]): 各分片的序号与幻灯片数据
+    """
+
+    folder = PPT_DIR / category
+    names = {f"output{shard_suffix(n)}.pptx" for n, _ in shards}
+    for path in [*folder.glob("output_*.pptx"), folder / "output.pptx"]:
+        if path.name not in names and path.exists():
+            path.unlink()
+            print(f"已移除多余的输出幻灯片：{category}/{path.name}。")
+    index_path = folder / SHARD_INDEX_NAME
+    if shards[0][0] is None:
+        index_path.unlink(missing_ok=True)
+        return
+
+    entries = []
+    for n, view in shards:
+        en_us = view["en_us"]
+        entries.append(
+            {
+                "file": f"output{shard_suffix(n)}.pptx",
+                "slides": len(en_us),
+                "first": {"key": en_us[0][0], "source": en_us[0][1]},
+                "last": {"key": en_us[-1][0], "source": en_us[-1][1]},
+            }
+        )
+    dump_json(
+        {"category": category, "shard_size": SHARD_SIZE, "shards": entries},
+        index_path,
+        indent=4,
+    )
+    print(f"已输出分类{category}的分片索引，共{len(entries)}个分片。")
+
+
+def edit_slide(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    slide_data: TableView,
+    category: str,
+    full: bool = False,
+    shard: Optional[int] = None,
+    index: Optional[ImageIndex] = None,
+    icons: Optional[AdvancementIcons] = None,
+) -> None:
+    """
+    编辑幻灯片，最后只保存一次。
+    若已有输出幻灯片与对应的构建清单，则只重新生成输入有变化的幻灯片。
+
+    Args:
+        slide_data (TableView): 幻灯片数据，分片时为该分片的数据
+        category (str): 分类名称
+        full (bool): 是否忽略构建清单，完整重新生成
+        shard (Optional[int]): 分片序号，从0开始，不分片时为None
+        index (Optional[ImageIndex]): 图片元数据索引，默认读取缓存中的索引
+        icons (Optional[AdvancementIcons]): 已解析的进度边框与图标，默认重新解析
+    """
+    if (template_path := category_template(slide_data, category)) is None:
+        return
+    suffix = shard_suffix(shard)
+
+    print(
+        f"开始生成幻灯片，分类：{shard_label(category, shard)}，"
+        f"共{len(slide_data['en_us'])}张。"
+    )
+    with Profiler(f"{category}{suffix}").run(PPT_DIR / category, suffix) as profiler:
+        profiler.count("slides", len(slide_data["en_us"]))
+        with profiler.stage("image_index"):
+            builder = CategoryBuilder(
+                slide_data,
+                category,
+                ImageIndex() if index is None else index,
+                profiler,
+                icons,
             )
+            builder.index.save()
+        with profiler.stage("fingerprint"):
+            new_slides = builder.fingerprints()
+            output_path = PPT_DIR / category / f"output{suffix}.pptx"
+            build = build_fingerprint(template_path)
+            manifest = SlideManifest(f"{category}{suffix}")
+
+        prs = None
+        if not full and manifest.usable(output_path, build):
+            if manifest.slides == new_slides:
+                print(f"分类{shard_label(category, shard)}的幻灯片没有变化。")
+                return
+            with profiler.stage("patch"):
+                prs = builder.patch(output_path, manifest.slides, new_slides)
+        if prs is None:
+            with profiler.stage("build"):
+                prs = builder.build()
+        with profiler.stage("dedupe"):
+            report_media(prs, profiler)
+        with profiler.stage("save"):
+            save_presentation(prs, output_path)
+        profiler.count("bytes_written", output_path.stat().st_size)
+        manifest.save(output_path, build, new_slides)
+
+
+def report_media(prs: Presentation, profiler: Profiler) -> None:
+    """
+    合并内容相同的图片部件，并记录、输出图片文件数与去重节省的字节数。
+
+    Args:
+        prs (Presentation): 幻灯片对象
+        profiler (Profiler): 记录计数的分析器
+    """
 
+    media, merged_bytes = dedupe_media(prs)
+    saved = profiler.counters.get("reused_image_bytes", 0) + merged_bytes
+    profiler.count("media_parts", media)
+    profiler.count("deduplicated_bytes", saved)
+    if media:
+        print(f"共{media}个图片文件，去重节省{saved}字节。")
 
-def edit_slide(slide_data: Dict[str, LdataTuple], category: str) -> None:
+
+def save_presentation(prs: Presentation, path: Path) -> None:
     """
-    编辑幻灯片。
+    保存演示文稿，并固定压缩包中各文件的时间戳，使相同的输入生成完全相同的文件。
+    各文件与python-pptx保存时一样使用DEFLATE压缩。
 
     Args:
-        slide_data (Dict[str, LdataTuple]): 幻灯片数据
+        prs (Presentation): 幻灯片对象
+        path (Path): 保存路径
+    """
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    with zipfile.ZipFile(buffer) as src, zipfile.ZipFile(
+        path, "w", zipfile.ZIP_DEFLATED
+    ) as dst:
+        for info in src.infolist():
+            # ZipInfo默认不压缩，写入时以ZipInfo的设置为准
+            fixed = zipfile.ZipInfo(info.filename)
+            fixed.compress_type = zipfile.ZIP_DEFLATED
+            dst.writestr(fixed, src.read(info))
+
+
+def build_category(
+    slide_data: TableView,
+    category: str,
+    full: bool = False,
+    shard: Optional[int] = None,
+    icons: Optional[AdvancementIcons] = None,
+) -> str:
+    """
+    在子进程中生成某一分类或其中一个分片的幻灯片，并收集输出。
+
+    Args:
+        slide_data (TableView): 幻灯片数据
         category (str): 分类名称
+        full (bool): 是否忽略构建清单，完整重新生成
+        shard (Optional[int]): 分片序号，从0开始，不分片时为None
+        icons (Optional[AdvancementIcons]): 已解析的进度边框与图标
+
+    Returns:
+        str: 生成过程中的输出
+    """
+
+    with redirect_stdout(io.StringIO()) as log:
+        edit_slide(slide_data, category, full, shard, icons=icons)
+    return log.getvalue()
+
+
+def image_categories(categories: List[str]) -> List[str]:
+    """
+    获取生成各分类幻灯片所需的图片分类，进度分类需要边框与图标所在的图片分类。
+
+    Args:
+        categories (List[str]): 需要生成的分类
+
+    Returns:
+        List[str]: 图片分类，不重复
+    """
+
+    folders: List[str] = []
+    for category in categories:
+        if category == "advancements":
+            folders.extend(ICON_IMAGE_CATEGORIES)
+        elif category not in NO_IMAGE_CATEGORIES:
+            folders.append(category)
+    return list(dict.fromkeys(folders))
+
+
+def refresh_image_index(
+    categories: List[str], optimize: bool = False, index: Optional[ImageIndex] = None
+) -> None:
+    """
+    预先更新所需分类的图片元数据索引，避免多个进程同时写入索引。
+    启用优化时需在生成前调用，否则添加图片时会使用未优化的原图。
+
+    Args:
+        categories (List[str]): 需要生成的分类
+        optimize (bool): 是否同时预先优化图片
+        index (Optional[ImageIndex]): 图片元数据索引，默认读取缓存中的索引
+    """
+
+    folders = image_categories(categories)
+    if index is None:
+        index = ImageIndex()
+    for folder in folders:
+        index.refresh(folder)
+    if optimize:
+        count, saved = optimize_images(index, folders)
+        print(f"已优化{count}张图片，共节省{saved}字节。")
+    index.save()
+
+
+def prepare_icon_names(digest: Optional[str] = None) -> Ldata:
     """
-    prs_path = PPT_DIR / category / "copied.pptx"
-    if prs_path.exists():
-        prs = prstt(prs_path)
-        edit_text(slide_data, category, prs)
-        if category not in {"advancements", "biome", "enchantment"}:
-            add_image(slide_data, category, prs)
-        prs.save(PPT_DIR / category / "output.pptx")
+    获取解析进度图标所需的物品与方块名称，与语言数据使用相同的缓存键，缓存命中时无需读取语言文件。
+
+    Args:
+        digest (Optional[str]): 已计算的语言数据缓存的键，默认重新计算
+
+    Returns:
+        Ldata: 物品与方块的键名与名称
+    """
+
+    if digest is None:
+        digest = language_digest()
+    names = load_cache("icon_names", digest)
+    if names is None:
+        names = icon_names(store.language_data_all)
+        save_cache("icon_names", digest, names)
+    return names
+
+
+def load_advancement_icons(
+    digest: Optional[str] = None, index: Optional[ImageIndex] = None
+) -> AdvancementIcons:
+    """
+    一次性解析进度分类所需的边框与图标图片，供检查与生成各分片共用。
+
+    Args:
+        digest (Optional[str]): 已计算的语言数据缓存的键，默认重新计算
+        index (Optional[ImageIndex]): 图片元数据索引，默认读取缓存中的索引
+
+    Returns:
+        AdvancementIcons: 进度边框与图标
+    """
+
+    icons = AdvancementIcons(index, names=prepare_icon_names(digest))
+    icons.index.save()
+    return icons
+
+
+def check_advancement_assets(
+    slide_data: TableView, icons: AdvancementIcons, digest: str
+) -> None:
+    """
+    在打开任何幻灯片之前，一次性检查进度分类所需的边框与图标图片，并汇总输出缺失项。
+    构建计划有效时直接使用其中的检查结果。
+
+    Args:
+        slide_data (TableView): 进度分类的幻灯片数据
+        icons (AdvancementIcons): 已解析的进度边框与图标
+        digest (str): 已计算的语言数据缓存的键
+    """
+
+    plan = load_plan(digest)
+    if plan is not None and "advancements" in plan["categories"]:
+        problems = plan["categories"]["advancements"]["problems"]
     else:
-        print(f"分类{category}不存在已复制的幻灯片。")
+        problems = icons.problems(key for key, _ in slide_data["en_us"])
+    if problems:
+        print(f"进度分类缺少{len(problems)}项数据或图片，对应的边框与图标不会被添加：")
+        for problem in problems:
+            print(f"  {problem}")
+
+
+def edit_slides(
+    data: Dict[str, TableView],
+    jobs: int = 1,
+    full: bool = False,
+    digest: Optional[str] = None,
+) -> None:
+    """
+    生成各分类的幻灯片，幻灯片较多的分类按配置拆分为分片，可使用多个进程并行生成各分类与分片。
+
+    Args:
+        data (Dict[str, TableView]): 各分类的幻灯片数据
+        jobs (int): 进程数，不大于1时依次生成
+        full (bool): 是否忽略构建清单，完整重新生成
+        digest (Optional[str]): 已计算的语言数据缓存的键，默认重新计算
+    """
+
+    icons = None
+    if "advancements" in data:
+        if digest is None:
+            digest = language_digest()
+        icons = load_advancement_icons(digest)
+        check_advancement_assets(data["advancements"], icons, digest)
+    shards = {
+        category: split_shards(slide_data) for category, slide_data in data.items()
+    }
+    tasks = [(category, n, view) for category in data for n, view in shards[category]]
+    parallel = jobs > 1 and len(tasks) > 1
+    if parallel or OPTIMIZE_IMAGES:
+        refresh_image_index(list(data), OPTIMIZE_IMAGES)
+    if not parallel:
+        for category, n, view in tasks:
+            edit_slide(view, category, full, n, icons=icons)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            # 幻灯片较多的分类与分片先提交，输出仍按分类与分片顺序
+            futures = {
+                (category, n): executor.submit(
+                    build_category,
+                    view,
+                    category,
+                    full,
+                    n,
+                    icons if category == "advancements" else None,
+                )
+                for category, n, view in sorted(
+                    tasks, key=lambda t: -len(t[2]["en_us"])
+                )
+            }
+            for category, n, _ in tasks:
+                print(futures[category, n].result(), end="")
+    for category, items in shards.items():
+        write_shard_index(category, items)
+
+
+def prepare_language_data(
+    profiler: Optional[Profiler] = None, digest: Optional[str] = None
+) -> StringTable:
+    """
+    读取并修正语言数据，源文件未变化时直接使用缓存。
+
+    Args:
+        profiler (Optional[Profiler]): 记录各阶段耗时的分析器
+        digest (Optional[str]): 已计算的语言数据缓存的键，默认重新计算
+
+    Returns:
+        StringTable: 修正后的语言数据组成的字符串表
+    """
+
+    if profiler is None:
+        profiler = Profiler("language_data", set())
+    with profiler.stage("cache"):
+        if digest is None:
+            digest = language_digest()
+        data = load_cache("language_data", digest)
+    if data is not None:
+        print("语言数据缓存命中，跳过读取与修正。")
+        return data
+    print("语言数据缓存未命中。")
+    # 语言文件可能已在本进程中读取过，如监视模式下，需按当前内容重新读取
+    store.reset()
+
+    with profiler.stage("load"):
+        data, data_all = load_language_files(lang_file_list)
+        if not IGNORE_CATEGORIES["advancements"]:
+            # 解析进度图标所需的名称在释放语言文件前取出并缓存，之后无需再次读取
+            save_cache("icon_names", digest, icon_names(store.language_data_all))
+        store.reset()
+    with profiler.stage("normalize"):
+        data = update_language_data(data, NEW_STRINGS_ONLY)
+        if NEW_STRINGS_ONLY:
+            data_all = update_language_data(data_all)
+            for lang in lang_list:
+                trims = {
+                    k: data_all[lang][k]
+                    for k in data[lang]
+                    if "trim_smithing_template" in k
+                }
+                data[lang].update(trims)
+        del data_all
+        if not IGNORE_SUPPLEMENTS:
+            load_supplements(data)
+
+    with profiler.stage("table"):
+        table = StringTable.from_language_data(data)
+    with profiler.stage("cache"):
+        save_cache("language_data", digest, table)
+    print("已写入语言数据缓存。")
+    return table
 
 
 def main() -> None:
@@ -205,37 +933,33 @@ def main() -> None:
     主函数，生成幻灯片内容。
     """
 
-    data, data_all = load_language_files(lang_file_list)
-    data = update_language_data(data, True)
-    data_all = update_language_data(data_all)
-    for lang in lang_list:
-        trims = {k: data_all[lang][k] for k in data[lang] if "trim_smithing_template" in k}
-        data[lang].update(trims)
-    if not IGNORE_SUPPLEMENTS:
-        load_supplements(data)
+    parser = argparse.ArgumentParser(description="生成幻灯片内容")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="并行生成各分类幻灯片的进程数，默认为1，即依次生成",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="忽略构建清单，完整重新生成所有幻灯片",
+    )
+    args = parser.parse_args()
+
+    categories = [c for c in CATEGORIES if not IGNORE_CATEGORIES[c]]
+    with Profiler("language_data").run(PPT_DIR) as profiler:
+        with profiler.stage("cache"):
+            digest = language_digest()
+        data = prepare_language_data(profiler, digest)
+        with profiler.stage("sort"):
+            slide_data = sort_categories(data, categories)
+        for category, view in slide_data.items():
+            profiler.count(f"{category}_slides", len(view["en_us"]))
 
     print("开始生成幻灯片内容。")
-    if not IGNORE_CATEGORIES["advancements"]:
-        sorted_data_advancements = sort_data(data, "advancements")
-        edit_slide(sorted_data_advancements, "advancements")
-    if not IGNORE_CATEGORIES["biome"]:
-        sorted_data_biome = sort_data(data, "biome")
-        edit_slide(sorted_data_biome, "biome")
-    if not IGNORE_CATEGORIES["block"]:
-        sorted_data_block = sort_data(data, "block")
-        edit_slide(sorted_data_block, "block")
-    if not IGNORE_CATEGORIES["entity"]:
-        sorted_data_entity = sort_data(data, "entity")
-        edit_slide(sorted_data_entity, "entity")
-    if not IGNORE_CATEGORIES["item"]:
-        sorted_data_item = sort_data(data, "item", "filled_map")
-        edit_slide(sorted_data_item, "item")
-    if not IGNORE_CATEGORIES["effect"]:
-        sorted_data_effect = sort_data(data, "effect")
-        edit_slide(sorted_data_effect, "effect")
-    if not IGNORE_CATEGORIES["enchantment"]:
-        sorted_data_enchantment = sort_data(data, "enchantment")
-        edit_slide(sorted_data_enchantment, "enchantment")
+    edit_slides(slide_data, args.jobs, args.full, digest)
     print("已完成。")
 
 
@@ -0,0 +1,113 @@
+# -*- encoding: utf-8 -*-
+"""在演示文稿内部复制幻灯片，无需PowerPoint与剪贴板"""
+
+import copy
+import random
+from pathlib import Path
+from typing import Dict, Optional
+
+from pptx import Presentation as prstt
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+from pptx.opc.packuri import PackURI
+from pptx.oxml.ns import qn
+from pptx.parts.slide import SlidePart
+from pptx.presentation import Presentation
+from pptx.slide import Slide
+
+# 可能引用关系的属性
+R_ATTRIBUTES = (qn("r:id"), qn("r:embed"), qn("r:link"))
+# 幻灯片的创建ID，PowerPoint复制幻灯片时会重新生成
+CREATION_ID = "{http://schemas.microsoft.com/office/powerpoint/2010/main}creationId"
+
+
+class SlideCloner:  # pylint: disable=too-few-public-methods
+    """
+    在同一演示文稿中批量复制幻灯片，与原幻灯片共用版式、图片等部件。
+    自行分配部件名、关系ID与幻灯片ID，避免每复制一张都遍历全部幻灯片。
+    指定随机种子时，生成的创建ID可重现。
+    """
+
+    def __init__(self, prs: Presentation, seed: Optional[str] = None) -> None:
+        self._random = random.Random(seed)
+        self._prs_part = prs.part
+        self._sld_id_lst = prs.part.presentation.element.get_or_add_sldIdLst()
+        self._next_part_idx = 1 + max(
+            (
+                rel.target_part.partname.idx or 0
+                for rel in prs.part.rels.values()
+                if rel.reltype == RT.SLIDE
+            ),
+            default=0,
+        )
+        self._next_slide_id = 1 + max(
+            (sld_id.id for sld_id in self._sld_id_lst.sldId_lst), default=255
+        )
+
+    def clone(
+        self, source: Slide, parts: Optional[Dict[PackURI, Part]] = None
+    ) -> Slide:
+        """
+        在演示文稿末尾复制一张幻灯片。
+
+        Args:
+            source (Slide): 被复制的幻灯片
+            parts (Optional[Dict[PackURI, Part]]): 从其他演示文稿复制时，
+                本演示文稿中按部件名查找的部件，如版式
+
+        Returns:
+            Slide: 新幻灯片
+        """
+
+        element = copy.deepcopy(source.element)
+        for creation_id in element.iter(CREATION_ID):
+            creation_id.set("val", str(self._random.randint(1, 2**32 - 1)))
+
+        partname = PackURI(f"/ppt/slides/slide{self._next_part_idx}.xml")
+        self._next_part_idx += 1
+        slide_part = SlidePart(partname, CT.PML_SLIDE, source.part.package, element)
+
+        # 复制关系，备注页属于各张幻灯片自身，不复制
+        rid_map = {}
+        for r_id, rel in source.part.rels.items():
+            if rel.reltype == RT.NOTES_SLIDE:
+                continue
+            if rel.is_external:
+                rid_map[r_id] = slide_part.relate_to(rel.target_ref, rel.reltype, True)
+            else:
+                target = rel.target_part
+                if parts is not None:
+                    target = parts[target.partname]
+                rid_map[r_id] = slide_part.relate_to(target, rel.reltype)
+        if any(old != new for old, new in rid_map.items()):
+            for node in element.iter():
+                for attr in R_ATTRIBUTES:
+                    if (r_id := node.get(attr)) in rid_map:
+                        node.set(attr, rid_map[r_id])
+
+        # pylint: disable=protected-access
+        r_id = self._prs_part.rels._add_relationship(RT.SLIDE, slide_part)
+        self._sld_id_lst._add_sldId(id=self._next_slide_id, rId=r_id)
+        # pylint: enable=protected-access
+        self._next_slide_id += 1
+        return slide_part.slide
+
+
+def replicate_slide(template_path: Path, count: int) -> Presentation:
+    """
+    读取模板，并将其第一张幻灯片复制到指定数量。
+
+    Args:
+        template_path (Path): 模板路径
+        count (int): 需要的幻灯片总数
+
+    Returns:
+        Presentation: 幻灯片对象
+    """
+
+    prs = prstt(template_path)
+    source = prs.slides[0]
+    cloner = SlideCloner(prs)
+    for _ in range(count - 1):
+        cloner.clone(source)
+    return prs
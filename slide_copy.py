@@ -1,43 +1,37 @@
 # -*- encoding: utf-8 -*-
 """
-自动复制模板幻灯片脚本，需要PowerPoint。
-模拟手动复制粘贴操作，请不要在脚本运行过程中覆盖剪贴板。
+自动复制模板幻灯片脚本。
+直接在幻灯片文件内部复制，无需PowerPoint与剪贴板，可在任意平台运行。
 """
 
-from win32com.client import Dispatch
-
 from base import (
     PPT_DIR,
+    CATEGORIES,
     IGNORE_CATEGORIES,
-    is_valid_key,
-    language_data,
+    language_digest,
+    sort_categories,
 )
+from build_plan import load_plan
+from slide import prepare_language_data
+from slide_cloner import replicate_slide
 
 
-def copy_slide(*category: str) -> None:
+def copy_slide(category: str, copy_num: int) -> None:
     """
     复制幻灯片
 
     Args:
         category (str): 类别
+        copy_num (int): 幻灯片数量
     """
 
-    print(f"开始复制模板幻灯片，分类：{category[0]}。")
-    dir_c = PPT_DIR / category[0]
-    ppt = Dispatch("PowerPoint.Application")
-    ppt.DisplayAlerts = 0  # 不显示，不警告
-    copy_num = sum(1 for key in language_data if is_valid_key(key, *category))
+    print(f"开始复制模板幻灯片，分类：{category}。")
+    dir_c = PPT_DIR / category
     if copy_num == 0:
-        print(f"不存在分类为{category[0]}的字符串。\n")
+        print(f"不存在分类为{category}的字符串。\n")
     else:
-        template_path = str(dir_c / "template.pptx")
-        ppt_file = ppt.Presentations.Open(template_path, True, False, False)
-        ppt_file.Slides(1).Copy()
-        for _ in range(copy_num - 1):
-            ppt_file.Slides.Paste()
-        ppt_file.SaveAs(str(dir_c / "copied.pptx"))
-        ppt_file.Close()
-        ppt.Quit()
+        prs = replicate_slide(dir_c / "template.pptx", copy_num)
+        prs.save(dir_c / "copied.pptx")
         print("已完成。\n")
 
 
@@ -45,20 +39,17 @@ def main() -> None:
     """
     主函数，检查各类别是否被忽略，并调用对应的复制幻灯片函数
     """
-    if not IGNORE_CATEGORIES["advancements"]:
-        copy_slide("advancements")
-    if not IGNORE_CATEGORIES["biome"]:
-        copy_slide("biome")
-    if not IGNORE_CATEGORIES["block"]:
-        copy_slide("block")
-    if not IGNORE_CATEGORIES["entity"]:
-        copy_slide("entity")
-    if not IGNORE_CATEGORIES["item"]:
-        copy_slide("item", "filled_map")
-    if not IGNORE_CATEGORIES["effect"]:
-        copy_slide("effect")
-    if not IGNORE_CATEGORIES["enchantment"]:
-        copy_slide("enchantment")
+    categories = [c for c in CATEGORIES if not IGNORE_CATEGORIES[c]]
+    # 与生成幻灯片使用相同的数据，构建计划有效时直接使用其中的幻灯片数量
+    digest = language_digest()
+    plan = load_plan(digest)
+    if plan is None:
+        views = sort_categories(prepare_language_data(digest=digest), categories)
+        counts = {c: len(view["en_us"]) for c, view in views.items()}
+    else:
+        counts = {c: plan["categories"][c]["slides"] for c in categories}
+    for category in categories:
+        copy_slide(category, counts[category])
 
 
 if __name__ == "__main__":
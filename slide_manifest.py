@@ -0,0 +1,106 @@
+# -*- encoding: utf-8 -*-
+"""幻灯片构建清单，记录各张幻灯片输入的指纹，用于增量生成"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from base import CACHE_DIR, OPTIMIZE_IMAGES, SLIDE_CONFIG
+from json_backend import load_json, save_json
+
+# 清单格式版本，生成方式变化时递增，使旧清单失效
+MANIFEST_VERSION = 1
+# 影响幻灯片内容的样式配置，分片大小等其他配置不影响各张幻灯片
+STYLE_KEYS = ("font", "bold", "size")
+
+
+def build_fingerprint(template_path: Path) -> str:
+    """
+    计算整个分类共用输入的指纹，包括模板幻灯片、幻灯片样式配置与是否优化图片。
+
+    Args:
+        template_path (Path): 模板路径
+
+    Returns:
+        str: 指纹
+    """
+
+    h = hashlib.sha1(str(MANIFEST_VERSION).encode())
+    h.update(template_path.read_bytes())
+    style = {key: SLIDE_CONFIG[key] for key in STYLE_KEYS}
+    h.update(json.dumps(style, sort_keys=True).encode("utf-8"))
+    if OPTIMIZE_IMAGES:
+        h.update(b"optimize_images")
+    return h.hexdigest()
+
+
+def slide_fingerprint(key: str, strings: List[str], images: List[Any]) -> str:
+    """
+    计算单张幻灯片输入的指纹。
+
+    Args:
+        key (str): 本地化键名
+        strings (List[str]): 各语言的字符串
+        images (List[Any]): 图片的分类、文件名、位置大小与哈希值
+
+    Returns:
+        str: 指纹
+    """
+
+    return hashlib.sha1(
+        json.dumps([key, strings, images], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+class SlideManifest:
+    """
+    某一分类输出幻灯片的构建清单，按顺序记录各张幻灯片的键名与指纹。
+    仅当输出文件与清单记录一致时，清单才可用于增量生成。
+    """
+
+    def __init__(self, category: str, path: Optional[Path] = None) -> None:
+        self.path = CACHE_DIR / "slides" / f"{category}.json" if path is None else path
+        self._data = load_json(self.path, {})
+
+    @property
+    def slides(self) -> List[Tuple[str, str]]:
+        """已生成幻灯片的键名与指纹"""
+        return [tuple(item) for item in self._data.get("slides", [])]
+
+    def usable(self, output_path: Path, build: str) -> bool:
+        """
+        判断清单能否用于增量生成。
+
+        Args:
+            output_path (Path): 输出幻灯片路径
+            build (str): 分类共用输入的指纹
+
+        Returns:
+            bool: 如果输出文件未被改动且共用输入未变化，返回 True，否则返回 False
+        """
+
+        if self._data.get("build") != build or not output_path.exists():
+            return False
+        stat = output_path.stat()
+        return self._data.get("output") == [stat.st_mtime_ns, stat.st_size]
+
+    def save(
+        self, output_path: Path, build: str, slides: List[Tuple[str, str]]
+    ) -> None:
+        """
+        保存清单。
+
+        Args:
+            output_path (Path): 输出幻灯片路径
+            build (str): 分类共用输入的指纹
+            slides (List[Tuple[str, str]]): 各张幻灯片的键名与指纹
+        """
+
+        stat = output_path.stat()
+        self._data = {
+            "build": build,
+            "output": [stat.st_mtime_ns, stat.st_size],
+            "slides": slides,
+        }
+        save_json(self._data, self.path)
@@ -0,0 +1,176 @@
+# -*- encoding: utf-8 -*-
+"""各语言共用键名的列式字符串表，分类与排序时仅生成行号视图，不复制字符串"""
+
+import sys
+from array import array
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+
+class StringTable:
+    """
+    列式字符串表，包含一个驻留的键名数组与每种语言一列字符串，各列按行对齐。
+    """
+
+    __slots__ = ("keys", "columns")
+
+    def __init__(self, keys: List[str], columns: Dict[str, List[str]]) -> None:
+        self.keys = keys
+        self.columns = columns
+
+    @classmethod
+    def from_language_data(
+        cls, lang_data: Dict[str, Dict[str, str]], key_lang: str = "en_us"
+    ) -> "StringTable":
+        """
+        由各语言的语言数据建立字符串表。
+
+        Args:
+            lang_data (Dict[str, Dict[str, str]]): 语言数据
+            key_lang (str): 决定行与其顺序的语言
+
+        Returns:
+            StringTable: 字符串表，其他语言缺少的字符串为空字符串
+        """
+
+        keys = [sys.intern(key) for key in lang_data[key_lang]]
+        columns = {
+            lang: [data.get(key, "") for key in keys]
+            for lang, data in lang_data.items()
+        }
+        return cls(keys, columns)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def take(self, rows: Sequence[int]) -> "StringTable":
+        """
+        仅保留指定的行，生成新的字符串表。
+
+        Args:
+            rows (Sequence[int]): 行号
+
+        Returns:
+            StringTable: 新的字符串表
+        """
+
+        return StringTable(
+            [self.keys[row] for row in rows],
+            {
+                lang: [column[row] for row in rows]
+                for lang, column in self.columns.items()
+            },
+        )
+
+    def group_rows(
+        self, classify: Callable[[str], Optional[str]], groups: Iterable[str]
+    ) -> Dict[str, array]:
+        """
+        按键名将行分组，所有分组共用一次遍历。
+
+        Args:
+            classify (Callable[[str], Optional[str]]): 获取键名所属分组的函数
+            groups (Iterable[str]): 分组名称
+
+        Returns:
+            Dict[str, array]: 各分组的行号，保持原有顺序
+        """
+
+        buckets = {name: array("I") for name in groups}
+        for row, key in enumerate(self.keys):
+            if (bucket := buckets.get(classify(key))) is not None:
+                bucket.append(row)
+        return buckets
+
+    def sorted_view(self, rows: Iterable[int], lang: str = "en_us") -> "TableView":
+        """
+        按某一语言的字符串排序指定的行，排序是稳定的。
+
+        Args:
+            rows (Iterable[int]): 行号
+            lang (str): 排序所依据的语言
+
+        Returns:
+            TableView: 排序后的视图
+        """
+
+        return TableView(
+            self, array("I", sorted(rows, key=self.columns[lang].__getitem__))
+        )
+
+
+class ColumnView(Sequence[Tuple[str, str]]):
+    """字符串表中某一语言的若干行，元素为键名与字符串。"""
+
+    __slots__ = ("_keys", "_values", "_rows")
+
+    def __init__(self, keys: List[str], values: List[str], rows: array) -> None:
+        self._keys = keys
+        self._values = values
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @overload
+    def __getitem__(self, n: int) -> Tuple[str, str]: ...
+
+    @overload
+    def __getitem__(self, n: slice) -> "ColumnView": ...
+
+    def __getitem__(self, n: Union[int, slice]) -> Union[Tuple[str, str], "ColumnView"]:
+        if isinstance(n, slice):
+            return ColumnView(self._keys, self._values, self._rows[n])
+        row = self._rows[n]
+        return self._keys[row], self._values[row]
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        keys, values = self._keys, self._values
+        for row in self._rows:
+            yield keys[row], values[row]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class TableView(Mapping[str, ColumnView]):
+    """
+    字符串表中若干行的视图，按语言取出对齐的各列。
+    跨进程传递时只序列化视图中的行。
+    """
+
+    __slots__ = ("table", "rows")
+
+    def __init__(self, table: StringTable, rows: array) -> None:
+        self.table = table
+        self.rows = rows
+
+    def __getitem__(self, lang: str) -> ColumnView:
+        return ColumnView(self.table.keys, self.table.columns[lang], self.rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.columns)
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+    def __reduce__(self) -> Tuple[type, Tuple[StringTable, array]]:
+        return TableView, (
+            self.table.take(self.rows),
+            array("I", range(len(self.rows))),
+        )
@@ -0,0 +1,48 @@
+# -*- encoding: utf-8 -*-
+"""检查保存的演示文稿可重现且经过压缩"""
+
+import io
+import zipfile
+from pathlib import Path
+
+from pptx import Presentation as prstt
+
+from base import PPT_DIR
+from slide import save_presentation
+
+TEMPLATE_PATH = PPT_DIR / "biome" / "template.pptx"
+
+
+def test_parts_are_deflated(tmp_path: Path) -> None:
+    """
+    各文件均使用DEFLATE压缩，文件大小不超过python-pptx直接保存的结果。
+
+    Args:
+        tmp_path (Path): 临时文件夹
+    """
+
+    prs = prstt(TEMPLATE_PATH)
+    path = tmp_path / "output.pptx"
+    save_presentation(prs, path)
+    with zipfile.ZipFile(path) as archive:
+        assert all(
+            info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist()
+        )
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    assert path.stat().st_size <= len(buffer.getvalue())
+
+
+def test_output_is_reproducible(tmp_path: Path) -> None:
+    """
+    相同的演示文稿多次保存得到完全相同的文件。
+
+    Args:
+        tmp_path (Path): 临时文件夹
+    """
+
+    prs = prstt(TEMPLATE_PATH)
+    first, second = tmp_path / "first.pptx", tmp_path / "second.pptx"
+    save_presentation(prs, first)
+    save_presentation(prs, second)
+    assert first.read_bytes() == second.read_bytes()
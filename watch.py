@@ -0,0 +1,281 @@
+# -*- encoding: utf-8 -*-
+"""监视语言文件、图片与配置文件，在内存中保留语言数据与图片索引，变化后仅重新生成受影响的分类"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from base import (
+    CATEGORIES,
+    CONFIG_PATH,
+    IGNORE_CATEGORIES,
+    IMAGE_DIR,
+    OPTIMIZE_IMAGES,
+    PPT_DIR,
+    Ldata,
+    language_digest,
+    language_inputs,
+    sort_categories,
+    store,
+)
+from advancement_icon import (
+    ADVANCEMENTS_DATA_PATH,
+    IMAGE_CATEGORIES as ICON_IMAGE_CATEGORIES,
+)
+from image_index import ImageIndex
+from slide import (
+    check_advancement_assets,
+    edit_slide,
+    load_advancement_icons,
+    prepare_icon_names,
+    prepare_language_data,
+    refresh_image_index,
+    split_shards,
+    write_shard_index,
+)
+from string_table import TableView
+
+# 轮询间隔，秒
+POLL_INTERVAL = 0.5
+# 防抖时间，秒，文件在此时间内不再变化后才重新生成
+DEBOUNCE_SECONDS = 1.0
+# 图片映射文件，仅影响获取图片
+IMAGE_MAPPING_PATH = IMAGE_DIR / "image_mapping.json"
+# 文件的修改时间与大小
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def take_snapshot(categories: Iterable[str]) -> Snapshot:
+    """
+    记录所监视文件的修改时间与大小。
+
+    Args:
+        categories (Iterable[str]): 需要生成的分类
+
+    Returns:
+        Snapshot: 各文件的修改时间与大小
+    """
+
+    paths: List[Path] = [
+        *language_inputs(),
+        CONFIG_PATH,
+        IMAGE_MAPPING_PATH,
+        ADVANCEMENTS_DATA_PATH,
+        *(PPT_DIR / category / "template.pptx" for category in categories),
+    ]
+    if IMAGE_DIR.is_dir():
+        paths.extend(IMAGE_DIR.glob("*/*.png"))
+    snapshot = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def changed_paths(old: Snapshot, new: Snapshot) -> Set[Path]:
+    """
+    比较两次记录，获取新增、移除或修改的文件。
+
+    Args:
+        old (Snapshot): 上一次记录
+        new (Snapshot): 本次记录
+
+    Returns:
+        Set[Path]: 有变化的文件
+    """
+
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+
+class Watcher:
+    """
+    在内存中保留修正后的语言数据、各分类排序后的幻灯片数据与图片索引，
+    文件变化后只重新生成受影响的分类。
+    """
+
+    def __init__(self, categories: List[str]) -> None:
+        self.categories = categories
+        self.index = ImageIndex()
+        self.views: Dict[str, TableView] = {}
+        self.digest = ""
+        self.names: Ldata = {}
+        self.snapshot: Snapshot = {}
+
+    def load_language_data(self) -> Set[str]:
+        """
+        重新读取语言数据，并与内存中的数据比较。
+        进度图标由英文物品与方块名称解析，这些名称有变化时进度分类也需重新生成。
+
+        Returns:
+            Set[str]: 幻灯片数据有变化的分类
+        """
+
+        old = self.views
+        store.reset()
+        digest = language_digest()
+        self.views = sort_categories(
+            prepare_language_data(digest=digest), self.categories
+        )
+        self.digest = digest
+        result = {c for c in self.categories if old.get(c) != self.views.get(c)}
+        if "advancements" in self.categories:
+            names = prepare_icon_names(digest)
+            if names != self.names:
+                result.add("advancements")
+            self.names = names
+        return result
+
+    def affected(self, paths: Set[Path]) -> Set[str]:
+        """
+        判断文件变化影响的分类，语言文件有变化时重新读取语言数据。
+
+        Args:
+            paths (Set[Path]): 有变化的文件
+
+        Returns:
+            Set[str]: 需要重新生成的分类
+        """
+
+        result = set()
+        if paths.intersection(language_inputs()):
+            try:
+                result |= self.load_language_data()
+            except (ValueError, OSError) as e:
+                # 编辑器保存时文件可能暂时不完整，保留上一次的数据，文件再次变化后重新读取
+                print(f"读取语言数据失败，沿用上一次的数据：{e}")
+        if ADVANCEMENTS_DATA_PATH in paths:
+            result.add("advancements")
+        for path in paths:
+            if path.suffix == ".png" and path.parent.parent == IMAGE_DIR:
+                folder = path.parent.name
+                result.add(folder)
+                if folder in ICON_IMAGE_CATEGORIES:
+                    result.add("advancements")
+            elif path.name == "template.pptx":
+                result.add(path.parent.name)
+        if IMAGE_MAPPING_PATH in paths:
+            print(
+                "图片映射已修改，请运行get_image.py获取图片，图片变化后将自动重新生成。"
+            )
+        return result.intersection(self.categories)
+
+    def rebuild(self, categories: Set[str]) -> None:
+        """
+        依次重新生成各分类的幻灯片，共用内存中的图片索引。
+
+        Args:
+            categories (Set[str]): 需要重新生成的分类
+        """
+
+        if OPTIMIZE_IMAGES:
+            refresh_image_index(
+                [c for c in self.categories if c in categories], True, self.index
+            )
+        for category in self.categories:
+            if category not in categories:
+                continue
+            shards = split_shards(self.views[category])
+            try:
+                icons = None
+                if category == "advancements":
+                    icons = load_advancement_icons(self.digest, self.index)
+                    check_advancement_assets(self.views[category], icons, self.digest)
+                for n, view in shards:
+                    edit_slide(view, category, False, n, self.index, icons)
+                write_shard_index(category, shards)
+            except (ValueError, OSError) as e:
+                # 输出幻灯片在PowerPoint中打开时无法写入，或进度数据暂时不完整，继续监视
+                print(f"分类{category}生成失败：{e}")
+        self.index.save()
+
+    def wait_for_changes(self, interval: float, debounce: float) -> Set[Path]:
+        """
+        轮询直到文件有变化，并在变化停止一段时间后返回。
+
+        Args:
+            interval (float): 轮询间隔，秒
+            debounce (float): 防抖时间，秒
+
+        Returns:
+            Set[Path]: 有变化的文件
+        """
+
+        while True:
+            time.sleep(interval)
+            latest = take_snapshot(self.categories)
+            if latest == self.snapshot:
+                continue
+            # 保存多个文件时可能连续触发，等待变化停止
+            while True:
+                time.sleep(debounce)
+                current = take_snapshot(self.categories)
+                if current == latest:
+                    break
+                latest = current
+            paths = changed_paths(self.snapshot, latest)
+            self.snapshot = latest
+            return paths
+
+    def run(self, interval: float, debounce: float) -> None:
+        """
+        生成一次所有分类，之后持续监视文件变化。
+
+        Args:
+            interval (float): 轮询间隔，秒
+            debounce (float): 防抖时间，秒
+        """
+
+        self.snapshot = take_snapshot(self.categories)
+        self.load_language_data()
+        self.rebuild(set(self.categories))
+        while True:
+            print("正在监视文件变化，按Ctrl+C停止。")
+            paths = self.wait_for_changes(interval, debounce)
+            print(f"检测到{len(paths)}个文件有变化。")
+            if CONFIG_PATH in paths:
+                # 配置在导入时读取，重新启动以使所有模块使用新的配置
+                print("配置文件已修改，重新启动。")
+                os.execv(sys.executable, [sys.executable, *sys.argv])
+            if categories := self.affected(paths):
+                self.rebuild(categories)
+            else:
+                print("没有需要重新生成的分类。")
+
+
+def main() -> None:
+    """
+    主函数，持续监视文件变化并重新生成幻灯片。
+    """
+
+    parser = argparse.ArgumentParser(description="监视文件变化并重新生成幻灯片")
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=POLL_INTERVAL,
+        help="轮询间隔，秒，默认为0.5",
+    )
+    parser.add_argument(
+        "-d",
+        "--debounce",
+        type=float,
+        default=DEBOUNCE_SECONDS,
+        help="防抖时间，秒，文件在此时间内不再变化后才重新生成，默认为1",
+    )
+    args = parser.parse_args()
+
+    categories = [c for c in CATEGORIES if not IGNORE_CATEGORIES[c]]
+    try:
+        Watcher(categories).run(args.interval, args.debounce)
+    except KeyboardInterrupt:
+        print("已停止监视。")
+
+
+if __name__ == "__main__":
+    main()